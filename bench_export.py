@@ -0,0 +1,56 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import load_harness
+import obrc_export
+
+
+def legacy_excel(db, list_type):
+    import pandas as pd
+
+    records = db.table(list_type).select("*").order("date_added", desc=True).execute().data
+    df = pd.DataFrame(records)
+    if 'id' in df.columns:
+        df = df.drop('id', axis=1)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name=list_type.title())
+    return len(records), buffer.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare export formats on synthetic list data")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows seeded into the blacklist table")
+    parser.add_argument("--list-type", default="blacklist")
+    args = parser.parse_args()
+
+    db = load_harness.FakeSupabase()
+    load_harness.seed_database(db, args.rows)
+    obrc_export._client = db
+    output_dir = tempfile.mkdtemp(prefix="obrc_bench_")
+
+    print(f"{'format':<16}{'rows':>8}{'seconds':>10}{'size KB':>12}")
+    try:
+        started = time.perf_counter()
+        rows, size = legacy_excel(db, args.list_type)
+        print(f"{'legacy excel':<16}{rows:>8}{time.perf_counter() - started:>10.2f}{size / 1024:>12.0f}")
+    except ImportError:
+        print("legacy excel    skipped (pandas not installed)")
+
+    for format_type in obrc_export.FILE_WRITERS:
+        started = time.perf_counter()
+        try:
+            result = obrc_export.run_export_job(0, args.list_type, format_type, output_dir)
+        except RuntimeError as e:
+            print(f"{format_type:<16}skipped ({e})")
+            continue
+        elapsed = time.perf_counter() - started
+        print(f"{format_type:<16}{result['rows']:>8}{elapsed:>10.2f}{result['bytes'] / 1024:>12.0f}")
+        os.remove(result["path"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+
+import obrc_blacklist as obrc
+
+
+OFFICERS = [f"officer{index}#{1000 + index}" for index in range(25)]
+
+
+def random_snowflake():
+    return str(random.randint(100000000000000000, 1400000000000000000))
+
+
+def person_row(index):
+    alts = [random_snowflake() for _ in range(random.randint(0, 3))]
+    officer = random.choice(OFFICERS)
+    return {
+        "id": index,
+        "discord_id": random_snowflake(),
+        "discord_name": f"member{index}",
+        "nation_id": str(100000 + index),
+        "nation_url": f"https://www.politicsandwar.com/nation/id={100000 + index}",
+        "possible_alts": ", ".join(f"<@{alt}>" for alt in alts) or "None",
+        "reason": random.choice(["Scamming", "Raiding allies", "Alt of a blacklisted nation", "Failed to pay debts"]),
+        "proof_urls": f"https://cdn.example.invalid/proof/{index}.png",
+        "added_by": officer,
+        "date_added": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T12:00:00",
+        "last_modified": None,
+        "modified_by": None,
+    }
+
+
+def company_row(index):
+    return {
+        "id": index,
+        "company_name": f"Company {index}",
+        "owner": f"<@{random_snowflake()}>",
+        "personnel": ", ".join(f"<@{random_snowflake()}>" for _ in range(3)),
+        "alts": "None",
+        "reason": "Scamming",
+        "proof_urls": "",
+        "added_by": random.choice(OFFICERS),
+        "date_added": "2025-01-01T12:00:00",
+        "last_modified": None,
+        "modified_by": None,
+    }
+
+
+def retained(build):
+    """Bytes still allocated after build() returns, i.e. what the resident rows cost."""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def ns_per(operation, rows, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            operation(row)
+    return (time.perf_counter() - started) / (repeat * len(rows)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per record and field access speed of slotted list records versus PostgREST dicts")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per representation")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    payloads = {
+        "person": (json.dumps([person_row(index) for index in range(args.rows)]), obrc.PersonRecord),
+        "company": (json.dumps([company_row(index) for index in range(args.rows)]), obrc.CompanyRecord),
+    }
+
+    print(f"{args.rows:,} rows per representation, decoded from one PostgREST-style JSON payload\n")
+    print(f"{'rows':<9}{'representation':<16}{'MB':>8}{'bytes/row':>11}{'get() ns':>10}{'attr ns':>9}")
+    for kind, (payload, record_type) in payloads.items():
+        dicts, dict_bytes = retained(lambda: json.loads(payload))
+        records, record_bytes = retained(lambda: [record_type(row, "blacklist") for row in json.loads(payload)])
+        assert all(record.to_dict() == {**row, "list_type": "blacklist"} for record, row in zip(records[:100], dicts))
+
+        dict_get = ns_per(lambda row: row.get("reason"), dicts)
+        record_get = ns_per(lambda row: row.get("reason"), records)
+        record_attr = ns_per(lambda row: row.reason, records)
+        print(f"{kind:<9}{'dict':<16}{dict_bytes / 1048576:>8.1f}{dict_bytes / args.rows:>11.0f}{dict_get:>10.0f}{'-':>9}")
+        print(f"{kind:<9}{record_type.__name__:<16}{record_bytes / 1048576:>8.1f}{record_bytes / args.rows:>11.0f}{record_get:>10.0f}{record_attr:>9.0f}")
+        del dicts, records
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+
+import obrc_blacklist as obrc
+
+
+def random_snowflake():
+    return random.randint(100000000000000000, 1400000000000000000)
+
+
+def measure(build):
+    """Run a build step and return its result with the bytes tracemalloc saw it keep and the build time."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def lookup_ns(lookup, probes):
+    started = time.perf_counter()
+    for probe in probes:
+        lookup(probe)
+    return (time.perf_counter() - started) / len(probes) * 1e9
+
+
+def people_rows(count):
+    """People-list rows as PostgREST returns them, each with a primary ID and one alt in possible_alts."""
+    rows = {table: [] for table in obrc.PEOPLE_TABLES}
+    for row_id in range(count):
+        table = obrc.PEOPLE_TABLES[row_id % len(obrc.PEOPLE_TABLES)]
+        rows[table].append({"id": row_id, "discord_id": str(random_snowflake()), "possible_alts": f"<@{random_snowflake()}>"})
+    return rows
+
+
+def build_indexes(rows):
+    store = obrc.ListStore()
+    for table, table_rows in rows.items():
+        for row in table_rows:
+            store._index(table, row)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and lookup cost of the known-ID snapshot versus the list store's ID indexes")
+    parser.add_argument("--ids", type=int, default=1_000_000, help="Discord IDs held (primary IDs plus alts)")
+    parser.add_argument("--probes", type=int, default=200_000, help="Lookups timed per case")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rows = people_rows(args.ids // 2)
+    # parse_alt_ids matches "<@id>" with both of its patterns, so count each ID once
+    ids = list({snowflake for table_rows in rows.values() for row in table_rows for snowflake in obrc.person_snowflakes(row)})
+    present = random.sample(ids, min(args.probes, len(ids)))
+    absent = [random_snowflake() for _ in range(args.probes)]
+
+    snowflakes, _, snowflake_seconds = measure(lambda: obrc.SnowflakeSet(ids))
+    store, index_bytes, index_seconds = measure(lambda: build_indexes(rows))
+
+    def find_person(snowflake):
+        key = str(snowflake)
+        for table in obrc.PEOPLE_TABLES:
+            if key in store.by_discord_id[table] or key in store.by_alt_id[table]:
+                return True
+        return False
+
+    print(f"{len(ids):,} IDs from {args.ids // 2:,} rows, {args.probes:,} probes per case\n")
+    print(f"{'structure':<28}{'MB':>9}{'bytes/ID':>10}{'build s':>9}{'absent ns':>11}{'present ns':>12}")
+    cases = (
+        ("SnowflakeSet", snowflakes.nbytes, snowflake_seconds, lambda snowflake: snowflake in snowflakes),
+        ("by_discord_id + by_alt_id", index_bytes, index_seconds, find_person),
+    )
+    for name, size, elapsed, lookup in cases:
+        print(f"{name:<28}{size / 1048576:>9.1f}{size / len(ids):>10.1f}{elapsed:>9.2f}"
+              f"{lookup_ns(lookup, absent):>11.0f}{lookup_ns(lookup, present):>12.0f}")
+    assert all(snowflake in snowflakes for snowflake in present[:1000])
+
+
+if __name__ == "__main__":
+    main()
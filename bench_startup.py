@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+
+EAGER_IMPORTS = "import pandas, gspread, openpyxl; import google.auth"
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+{preload}
+import obrc_blacklist
+ready = time.perf_counter()
+print(json.dumps({{
+    "seconds": ready - started,
+    "rss": obrc_blacklist.current_rss_bytes(),
+    "export_modules": [name for name in obrc_blacklist.EXPORT_DEPENDENCIES if name in sys.modules],
+}}))
+"""
+
+
+def run_child(preload):
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://localhost")
+    env.setdefault("SUPABASE_KEY", "bench")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(preload=preload)],
+        capture_output=True, text=True, env=env, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_breakdown(importtime_output):
+    """Sum self import time (-X importtime) by top-level package."""
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold start with lazy vs eager export dependencies")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per mode")
+    parser.add_argument("--top", type=int, default=12, help="Packages shown in the import breakdown")
+    args = parser.parse_args()
+
+    modes = {"lazy (current)": "", "eager": EAGER_IMPORTS}
+    breakdowns = {}
+    print(f"{'mode':<18}{'median ms':>11}{'min ms':>9}{'RSS MB':>9}  export deps loaded")
+    for mode, preload in modes.items():
+        samples = []
+        for _ in range(args.runs):
+            sample, importtime_output = run_child(preload)
+            samples.append(sample)
+        breakdowns[mode] = import_breakdown(importtime_output)
+        seconds = [sample["seconds"] * 1000 for sample in samples]
+        rss = statistics.median(sample["rss"] for sample in samples) / 1048576
+        loaded = ", ".join(samples[-1]["export_modules"]) or "none"
+        print(f"{mode:<18}{statistics.median(seconds):>11.0f}{min(seconds):>9.0f}{rss:>9.1f}  {loaded}")
+
+    print("\nTime to on_ready adds gateway login on top of these numbers; that part does not depend on imports.")
+    for mode, breakdown in breakdowns.items():
+        print(f"\nImport cost by package, {mode}:")
+        for name, self_us in breakdown[:args.top]:
+            print(f"  {name:<24}{self_us / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+
+import load_harness
+
+obrc = load_harness.obrc
+
+
+async def run_lifecycle(harness, index):
+    """Create a vote ticket, cast votes, then expire and close it. Returns per-phase seconds."""
+    gateway = harness.gateway
+    target = f"bench target {index}"
+    proposal = json.dumps({"reason": "Ticket backend benchmark", "proof_urls": "https://example.invalid/proof.png"})
+
+    started = time.perf_counter()
+    channel, poll_message = await obrc.voting_manager.create_voting_ticket(
+        harness.guild, "add", target, str(9000 + index), "1", proposal, gateway.officer
+    )
+    created = time.perf_counter()
+    if not channel:
+        raise RuntimeError("ticket creation failed")
+
+    await obrc.outbox.flush()
+    poll_message.poll.answers[0].vote_count = 3
+    poll_message.poll.answers[1].vote_count = 1
+    ticket_row = next(row for row in harness.db.tables["voting_tickets"] if row["poll_message_id"] == str(poll_message.id))
+    await obrc.voting_manager._process_expired_ticket(obrc.bot, ticket_row)
+    closed = time.perf_counter()
+    return created - started, closed - created
+
+
+async def bench_backend(backend, args):
+    obrc.TICKET_BACKEND = backend
+    obrc.member_lookup = obrc.MemberLookup()
+    obrc.ticket_placement = obrc.TicketPlacement()
+    obrc.guild_configs = obrc.GuildConfigStore()
+    harness = load_harness.LoadHarness(load_harness.parse_args([
+        "--voters", str(args.voters),
+        "--rest-latency-ms", str(args.rest_latency_ms),
+        "--sleep-scale", "0",
+        "--seed-rows", "0",
+    ]))
+    gateway = harness.gateway
+    before = dict(gateway.rest_calls)
+
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(args.tickets):
+            timings.append(await run_lifecycle(harness, index))
+
+    routes = {
+        route: (count - before.get(route, 0)) / args.tickets
+        for route, count in gateway.rest_calls.items()
+        if count > before.get(route, 0)
+    }
+    return timings, routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare REST calls and latency per ticket lifecycle for the channel and thread backends")
+    parser.add_argument("--tickets", type=int, default=20, help="Lifecycles per backend")
+    parser.add_argument("--voters", type=int, default=15, help="Members holding the voter role (each gets a DM)")
+    parser.add_argument("--rest-latency-ms", type=float, default=80.0, help="Simulated latency per REST call")
+    args = parser.parse_args()
+
+    results = {backend: asyncio.run(bench_backend(backend, args)) for backend in ("channel", "thread")}
+
+    print(f"{args.tickets} lifecycles per backend, {args.voters} voters, {args.rest_latency_ms:.0f} ms per REST call\n")
+    print(f"{'backend':<10}{'REST/ticket':>12}{'excl. DMs':>11}{'create p50 ms':>15}{'close p50 ms':>14}")
+    for backend, (timings, routes) in results.items():
+        total = sum(routes.values())
+        dms = routes.get("POST /users/@me/channels", 0) * 2
+        create = statistics.median(timing[0] for timing in timings) * 1000
+        close = statistics.median(timing[1] for timing in timings) * 1000
+        print(f"{backend:<10}{total:>12.1f}{total - dms:>11.1f}{create:>15.0f}{close:>14.0f}")
+
+    for backend, (_, routes) in results.items():
+        print(f"\nREST calls per lifecycle, {backend} backend:")
+        for route, count in sorted(routes.items(), key=lambda item: item[1], reverse=True):
+            print(f"  {route:<56}{count:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,878 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import math
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "harness.stub.key")
+
+import discord
+
+import obrc_blacklist as obrc
+
+
+ACK_WINDOW_SECONDS = 3.0
+GUILD_ID = 1319746765771116615
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, db, table_name):
+        self.db = db
+        self.table_name = table_name
+        self.operation = "select"
+        self.payload = None
+        self.filters = []
+        self.order_by = []
+        self.row_range = None
+        self.row_limit = None
+        self.count = None
+        self.on_conflict = "id"
+
+    def select(self, *columns, count=None):
+        self.operation = "select"
+        self.count = count
+        return self
+
+    def insert(self, data):
+        self.operation = "insert"
+        self.payload = data
+        return self
+
+    def upsert(self, data, on_conflict="id"):
+        self.operation = "upsert"
+        self.payload = data
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, data):
+        self.operation = "update"
+        self.payload = data
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def _filter(self, column, predicate):
+        self.filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) == str(value))
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: v is None or str(v) != str(value))
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) < str(value))
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) <= str(value))
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) > str(value))
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) >= str(value))
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        return self._filter(column, lambda v: v is not None and str(v) in values)
+
+    def is_(self, column, value):
+        if value in (None, "null"):
+            return self._filter(column, lambda v: v is None)
+        return self._filter(column, lambda v: v is not None)
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + ".*".join(re.escape(part) for part in pattern.split("%")) + "$", re.IGNORECASE | re.DOTALL)
+        return self._filter(column, lambda v: v is not None and bool(regex.match(str(v))))
+
+    def order(self, column, desc=False, nullsfirst=None):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    def _matches(self, row):
+        return all(predicate(row.get(column)) for column, predicate in self.filters)
+
+    def execute(self):
+        return self.db.execute(self)
+
+
+class FakeSupabase:
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.tables = {}
+        self.next_ids = {}
+        self.calls = 0
+        self.listeners = []
+
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+
+    def notify(self, event_type, table_name, record=None, old_record=None):
+        """Local stand-in for Realtime/LISTEN-NOTIFY: report a row change to every listener."""
+        for listener in self.listeners:
+            listener(event_type, table_name, dict(record) if record else None, old_record)
+
+    def rows(self, table_name):
+        return self.tables.setdefault(table_name, [])
+
+    def _new_row(self, table_name, data):
+        row = dict(data)
+        if "id" not in row:
+            self.next_ids[table_name] = self.next_ids.get(table_name, 0) + 1
+            row["id"] = self.next_ids[table_name]
+        row.setdefault("date_added", datetime.utcnow().isoformat())
+        if table_name in ("voting_tickets", "evidence_votes"):
+            row.setdefault("status", "active")
+        return row
+
+    def execute(self, query):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        rows = self.rows(query.table_name)
+
+        if query.operation == "insert":
+            payload = query.payload if isinstance(query.payload, list) else [query.payload]
+            inserted = [self._new_row(query.table_name, item) for item in payload]
+            rows.extend(inserted)
+            for row in inserted:
+                self.notify("INSERT", query.table_name, row)
+            return FakeResponse([dict(row) for row in inserted])
+
+        if query.operation == "upsert":
+            payload = query.payload if isinstance(query.payload, list) else [query.payload]
+            key = query.on_conflict
+            result = []
+            for item in payload:
+                existing = next((row for row in rows if key in item and str(row.get(key)) == str(item[key])), None)
+                if existing is not None:
+                    existing.update(item)
+                    result.append(dict(existing))
+                    self.notify("UPDATE", query.table_name, existing, {"id": existing["id"]})
+                else:
+                    row = self._new_row(query.table_name, item)
+                    rows.append(row)
+                    result.append(dict(row))
+                    self.notify("INSERT", query.table_name, row)
+            return FakeResponse(result)
+
+        matched = [row for row in rows if query._matches(row)]
+
+        if query.operation == "update":
+            for row in matched:
+                row.update(query.payload)
+                self.notify("UPDATE", query.table_name, row, {"id": row["id"]})
+            return FakeResponse([dict(row) for row in matched])
+
+        if query.operation == "delete":
+            self.tables[query.table_name] = [row for row in rows if not query._matches(row)]
+            for row in matched:
+                self.notify("DELETE", query.table_name, None, {"id": row["id"]})
+            return FakeResponse([dict(row) for row in matched])
+
+        for column, desc in reversed(query.order_by):
+            matched = sorted(matched, key=lambda row: (row.get(column) is not None, row.get(column) if isinstance(row.get(column), int) else str(row.get(column) or "")), reverse=desc)
+        total = len(matched)
+        if query.row_range:
+            start, end = query.row_range
+            matched = matched[start:end + 1]
+        if query.row_limit is not None:
+            matched = matched[:query.row_limit]
+        return FakeResponse([dict(row) for row in matched], count=total if query.count else None)
+
+
+class StubRole:
+    def __init__(self, role_id, name, members=None):
+        self.id = role_id
+        self.name = name
+        self.members = members if members is not None else []
+        self.mention = f"<@&{role_id}>"
+        self.guild = None
+
+    def __str__(self):
+        return self.name
+
+
+class StubMember:
+    def __init__(self, member_id, name, guild, roles=None):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.guild = guild
+        self.roles = roles if roles is not None else []
+        self.mention = f"<@{member_id}>"
+        self.bot = False
+
+    def __str__(self):
+        return self.name
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def send(self, *args, **kwargs):
+        await self.guild.gateway.rest("POST /users/@me/channels")
+        return await self.guild.gateway.rest("POST /channels/{channel_id}/messages")
+
+    async def add_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.gateway.rest("PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}")
+            if role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.gateway.rest("DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}")
+            if role in self.roles:
+                self.roles.remove(role)
+
+
+class StubAnswer:
+    def __init__(self, text, emoji, vote_count=0, voters=None):
+        self.text = text
+        self.emoji = emoji
+        self.vote_count = vote_count
+        self.voters = voters or []
+
+    async def users(self):
+        for voter in self.voters:
+            yield voter
+
+
+class StubPoll:
+    def __init__(self, question, answers, message_id=None):
+        self.question = question
+        self.answers = answers
+        self.message_id = message_id
+
+
+class StubMessage:
+    def __init__(self, message_id, channel, author, content=None, embeds=None, poll=None):
+        self.id = message_id
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.poll = poll
+        self.created_at = datetime.utcnow()
+
+    async def pin(self):
+        await self.channel.gateway.rest("PUT /channels/{channel_id}/pins/{message_id}")
+
+
+class StubTextChannel:
+    type = discord.ChannelType.text
+
+    def __init__(self, channel_id, name, guild, category=None):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.gateway = guild.gateway
+        self.category = category
+        self.category_id = category.id if category else None
+        self.mention = f"<#{channel_id}>"
+        self.jump_url = f"https://discord.com/channels/{guild.id}/{channel_id}"
+        self.messages = []
+
+    def _to_stub_poll(self, poll, message_id):
+        if isinstance(poll, StubPoll):
+            return poll
+        answers = [StubAnswer(answer.text, answer.emoji) for answer in poll.answers]
+        return StubPoll(str(poll.question), answers, message_id)
+
+    async def send(self, content=None, embed=None, file=None, poll=None, **kwargs):
+        await self.gateway.rest("POST /channels/{channel_id}/messages")
+        message_id = self.gateway.next_snowflake()
+        message = StubMessage(
+            message_id, self, self.guild.me, content,
+            [embed] if embed else [],
+            self._to_stub_poll(poll, message_id) if poll else None
+        )
+        self.messages.append(message)
+        self.gateway.messages[message_id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        await self.gateway.rest("GET /channels/{channel_id}/messages/{message_id}")
+        message = self.gateway.messages.get(int(message_id))
+        if message is None:
+            raise discord.NotFound(StubHTTPResponse(404), "Unknown Message")
+        return message
+
+    async def history(self, limit=None, oldest_first=False):
+        await self.gateway.rest("GET /channels/{channel_id}/messages")
+        messages = list(self.messages) if oldest_first else list(reversed(self.messages))
+        for message in messages[:limit]:
+            yield message
+
+    async def delete(self, reason=None):
+        await self.gateway.rest("DELETE /channels/{channel_id}")
+        self.gateway.channels.pop(self.id, None)
+        if self.category and self in self.category.channels:
+            self.category.channels.remove(self)
+
+    async def create_thread(self, name, type=None, invitable=True, auto_archive_duration=None, **kwargs):
+        await self.gateway.rest("POST /channels/{channel_id}/threads")
+        thread = StubThread(self.gateway.next_snowflake(), name, self.guild, self)
+        self.gateway.channels[thread.id] = thread
+        return thread
+
+
+class StubThread(StubTextChannel):
+    type = discord.ChannelType.private_thread
+
+    def __init__(self, thread_id, name, guild, parent):
+        super().__init__(thread_id, name, guild)
+        self.parent = parent
+        self.archived = False
+        self.locked = False
+
+    async def edit(self, archived=None, locked=None, **kwargs):
+        await self.gateway.rest("PATCH /channels/{channel_id}")
+        if archived is not None:
+            self.archived = archived
+        if locked is not None:
+            self.locked = locked
+        if self.archived:
+            self.gateway.channels.pop(self.id, None)
+        return self
+
+
+class StubCategory:
+    def __init__(self, category_id, name, guild):
+        self.id = category_id
+        self.name = name
+        self.guild = guild
+        self.channels = []
+        self.overwrites = {}
+        self.position = 0
+
+    async def create_text_channel(self, name, overwrites=None, **kwargs):
+        await self.guild.gateway.rest("POST /guilds/{guild_id}/channels")
+        if len(self.channels) >= 50:
+            raise discord.HTTPException(StubHTTPResponse(400), "Maximum number of channels in category reached (50)")
+        channel = self.guild.gateway.add_channel(name, category=self)
+        self.channels.append(channel)
+        return channel
+
+
+class StubHTTPResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "stub"
+
+
+class StubGuild:
+    def __init__(self, gateway, guild_id, name):
+        self.gateway = gateway
+        self.id = guild_id
+        self.name = name
+        self.default_role = StubRole(guild_id, "@everyone")
+        self.roles = [self.default_role]
+        self.categories = []
+        self.members = {}
+        self.me = None
+        self.filesize_limit = 10 * 1024 * 1024
+        self.chunked = obrc.GATEWAY_PROFILE == "full"
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return self.gateway.channels.get(channel_id)
+
+    async def create_category(self, name, overwrites=None, position=None, reason=None):
+        await self.gateway.rest("POST /guilds/{guild_id}/channels")
+        category = StubCategory(self.gateway.next_snowflake(), name, self)
+        category.overwrites = overwrites or {}
+        category.position = position or 0
+        self.categories.append(category)
+        self.gateway.channels[category.id] = category
+        return category
+
+    async def fetch_member(self, member_id):
+        await self.gateway.rest("GET /guilds/{guild_id}/members/{user_id}")
+        member = self.members.get(member_id)
+        if member is None:
+            raise discord.NotFound(StubHTTPResponse(404), "Unknown Member")
+        return member
+
+    async def chunk(self, cache=True):
+        self.gateway.chunk_requests += 1
+        if cache:
+            self.chunked = True
+        return list(self.members.values())
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+
+class StubInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, *args, **kwargs):
+        self.interaction.acked_at = time.perf_counter()
+        self.interaction.completed_at = self.interaction.acked_at
+
+    def is_done(self):
+        return self.interaction.acked_at is not None
+
+
+class StubFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        await self.interaction.guild.gateway.rest("POST /webhooks/{application_id}/{interaction_token}")
+        self.interaction.completed_at = time.perf_counter()
+        self.interaction.sent.append(kwargs)
+        return StubWebhookMessage(self.interaction)
+
+
+class StubWebhookMessage:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def edit(self, **kwargs):
+        await self.interaction.guild.gateway.rest("PATCH /webhooks/{application_id}/{interaction_token}/messages/{message_id}")
+        self.interaction.sent.append(kwargs)
+
+
+class StubInteraction:
+    def __init__(self, guild, user, channel=None):
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.created = time.perf_counter()
+        self.created_at = discord.utils.utcnow()
+        self.acked_at = None
+        self.completed_at = None
+        self.sent = []
+        self.response = StubInteractionResponse(self)
+        self.followup = StubFollowup(self)
+
+
+class StubAttachment:
+    def __init__(self, url):
+        self.url = url
+
+
+class StubPollVote:
+    def __init__(self, poll, user_id, answer_id):
+        self.poll = poll
+        self.user_id = user_id
+        self.answer_id = answer_id
+
+
+class FakeGateway:
+    def __init__(self, rest_latency_ms=0.0):
+        self.rest_latency = rest_latency_ms / 1000.0
+        self.snowflakes = itertools.count(1400000000000000000)
+        self.channels = {}
+        self.messages = {}
+        self.rest_calls = {}
+        self.chunk_requests = 0
+        self.guild = None
+
+    def next_snowflake(self):
+        return next(self.snowflakes)
+
+    async def rest(self, route):
+        self.rest_calls[route] = self.rest_calls.get(route, 0) + 1
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+
+    def add_channel(self, name, category=None):
+        channel = StubTextChannel(self.next_snowflake(), name, self.guild, category)
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        await self.rest("GET /channels/{channel_id}")
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(StubHTTPResponse(404), "Unknown Channel")
+        return channel
+
+    def get_guild(self, guild_id):
+        return self.guild if self.guild and self.guild.id == guild_id else None
+
+    def build_guild(self, voter_count, member_count):
+        guild = StubGuild(self, GUILD_ID, "OBRC Harness")
+        self.guild = guild
+
+        voter_role = StubRole(obrc.VOTER_ROLE_ID, "Voter")
+        member_role = StubRole(self.next_snowflake(), obrc.OBRC_MEMBER_NAME)
+        commissioner_role = StubRole(obrc.COMMISSIONER_ID, "Commissioner")
+        guild.roles.extend([
+            voter_role, member_role, commissioner_role,
+            StubRole(self.next_snowflake(), obrc.auto_role_manager.BLACKLISTED_ROLE),
+            StubRole(self.next_snowflake(), obrc.auto_role_manager.COMPANY_BLACKLIST_OWNER_ROLE),
+            StubRole(self.next_snowflake(), obrc.auto_role_manager.COMPANY_BLACKLIST_PERSONNEL_ROLE),
+        ])
+        for role in guild.roles:
+            role.guild = guild
+        ticket_category = StubCategory(obrc.TICKET_CATEGORY_ID, "Tickets", guild)
+        guild.categories.append(ticket_category)
+        self.channels[ticket_category.id] = ticket_category
+
+        guild.me = StubMember(self.next_snowflake(), "OBRC Bot", guild)
+        transcript_channel = StubTextChannel(obrc.TRANSCRIPT_CHANNEL_ID, "transcripts", guild)
+        self.channels[transcript_channel.id] = transcript_channel
+        obrc.TICKET_THREAD_CHANNEL_ID = obrc.TICKET_THREAD_CHANNEL_ID or self.next_snowflake()
+        voting_channel = StubTextChannel(obrc.TICKET_THREAD_CHANNEL_ID, "votes", guild)
+        self.channels[voting_channel.id] = voting_channel
+
+        for index in range(member_count):
+            member = StubMember(self.next_snowflake(), f"member{index}", guild, [member_role])
+            guild.members[member.id] = member
+        for index in range(voter_count):
+            voter = StubMember(self.next_snowflake(), f"voter{index}", guild, [member_role, voter_role, commissioner_role])
+            guild.members[voter.id] = voter
+            voter_role.members.append(voter)
+
+        self.officer = voter_role.members[0] if voter_role.members else guild.me
+        return guild
+
+
+class ScaledAsyncio:
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay, result=None):
+        return await asyncio.sleep(delay * self.scale, result)
+
+
+def random_snowflake():
+    return random.randint(10 ** 17, 10 ** 19 - 1)
+
+
+def seed_database(db, rows):
+    known_ids = []
+    for table_name in ("blacklist", "greylist"):
+        for index in range(rows):
+            discord_id = random_snowflake()
+            alts = [random_snowflake() for _ in range(random.randint(0, 3))]
+            known_ids.append(discord_id)
+            known_ids.extend(alts)
+            db.rows(table_name).append(db._new_row(table_name, {
+                "discord_id": str(discord_id),
+                "discord_name": f"{table_name}-{index}",
+                "nation_id": str(100000 + index),
+                "nation_url": f"https://www.politicsandwar.com/nation/id={100000 + index}",
+                "possible_alts": ", ".join(f"<@{alt}>" for alt in alts) or "None",
+                "reason": "Seeded by load harness",
+                "proof_urls": "https://example.invalid/proof.png",
+                "added_by": "load_harness",
+            }))
+    for table_name in ("blacklist_coo", "greylist_coo"):
+        for index in range(max(1, rows // 10)):
+            owner = random_snowflake()
+            known_ids.append(owner)
+            db.rows(table_name).append(db._new_row(table_name, {
+                "company_name": f"{table_name} company {index}",
+                "owner": f"<@{owner}>",
+                "personnel": ", ".join(f"<@{random_snowflake()}>" for _ in range(3)),
+                "alts": "None",
+                "reason": "Seeded by load harness",
+                "proof_urls": "",
+                "added_by": "load_harness",
+            }))
+    return known_ids
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LoadHarness:
+    def __init__(self, args):
+        self.args = args
+        self.db = FakeSupabase(args.db_latency_ms)
+        self.gateway = FakeGateway(args.rest_latency_ms)
+        self.guild = self.gateway.build_guild(args.voters, args.members)
+        self.known_ids = seed_database(self.db, args.seed_rows)
+        self.poll_messages = []
+
+        obrc.supabase = obrc.InstrumentedSupabase(self.db)
+        obrc.outbox = obrc.WriteOutbox(":memory:")
+        obrc.asyncio = ScaledAsyncio(args.sleep_scale)
+        obrc.bot.get_guild = self.gateway.get_guild
+        obrc.bot.get_channel = self.gateway.get_channel
+
+    def random_member(self):
+        members = list(self.guild.members.values())
+        return random.choice(members)
+
+    def target_member(self):
+        if self.known_ids and random.random() < self.args.hit_ratio:
+            member_id = random.choice(self.known_ids)
+        else:
+            member_id = random_snowflake()
+        return StubMember(member_id, f"target{member_id}", self.guild, [])
+
+    async def run_search_list(self):
+        interaction = StubInteraction(self.guild, self.random_member())
+        await obrc.search_list.callback(interaction, self.target_member())
+        return interaction
+
+    async def run_propose_add(self):
+        interaction = StubInteraction(self.guild, self.gateway.officer)
+        target = self.target_member()
+        await obrc.propose_add.callback(
+            interaction,
+            target,
+            str(target.id),
+            str(random.randint(1, 999999)),
+            StubAttachment("https://example.invalid/proof.png"),
+            "Load harness proposal"
+        )
+        for message in reversed(self.gateway.messages.values()):
+            if message.poll:
+                self.poll_messages.append(message)
+                break
+        return interaction
+
+    async def run_member_join(self):
+        member = self.target_member()
+        member.guild = self.guild
+        started = time.perf_counter()
+        await obrc.on_member_join(member)
+        return started
+
+    async def run_poll_vote(self):
+        if self.poll_messages:
+            message = random.choice(self.poll_messages)
+            poll = message.poll
+            poll.message_id = message.id
+        else:
+            poll = StubPoll("Add to nobody?", [StubAnswer("Yes", "✅"), StubAnswer("No", "❌")], random_snowflake())
+        answer_id = random.randint(0, len(poll.answers) - 1)
+        poll.answers[answer_id].vote_count += 1
+        await obrc.on_poll_vote_add(StubPollVote(poll, self.random_member().id, answer_id))
+
+    async def run_check_expired(self):
+        for row in self.db.rows("voting_tickets"):
+            if row.get("status") == "active" and random.random() < 0.5:
+                row["expires_at"] = "2000-01-01T00:00:00"
+        await obrc.voting_manager.check_expired_polls(self.gateway)
+
+    async def monitor_loop_lag(self, samples, stop):
+        interval = 0.05
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            samples.append(max(0.0, time.perf_counter() - started - interval))
+
+    async def run_stage(self, rate):
+        scenarios = {
+            "search_list": (self.args.mix_search, self.run_search_list),
+            "propose_add": (self.args.mix_propose, self.run_propose_add),
+            "on_member_join": (self.args.mix_join, self.run_member_join),
+            "on_poll_vote_add": (self.args.mix_vote, self.run_poll_vote),
+            "check_expired_polls": (self.args.mix_expire, self.run_check_expired),
+        }
+        names = [name for name, (weight, _) in scenarios.items() if weight > 0]
+        weights = [scenarios[name][0] for name in names]
+
+        results = {name: {"latency": [], "ack": [], "errors": 0} for name in names}
+        lag_samples = []
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(self.monitor_loop_lag(lag_samples, stop))
+        pending = set()
+
+        async def invoke(name, scheduled):
+            try:
+                outcome = await scenarios[name][1]()
+                finished = time.perf_counter()
+                if isinstance(outcome, StubInteraction):
+                    if outcome.acked_at is not None:
+                        results[name]["ack"].append(outcome.acked_at - scheduled)
+                    finished = outcome.completed_at or finished
+                results[name]["latency"].append(finished - scheduled)
+            except Exception as e:
+                results[name]["errors"] += 1
+                if self.args.verbose:
+                    print(f"Harness error in {name}: {e}", file=sys.__stderr__)
+
+        stage_started = time.perf_counter()
+        arrivals = 0
+        next_arrival = stage_started
+        while next_arrival - stage_started < self.args.duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = random.choices(names, weights)[0]
+            task = asyncio.create_task(invoke(name, next_arrival))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            arrivals += 1
+            next_arrival += random.expovariate(rate)
+        arrival_window = time.perf_counter() - stage_started
+
+        if pending:
+            await asyncio.wait(pending, timeout=self.args.drain_timeout)
+        stop.set()
+        await lag_task
+        for task in list(pending):
+            task.cancel()
+
+        completed = sum(len(result["latency"]) for result in results.values())
+        return {
+            "rate": rate,
+            "arrivals": arrivals,
+            "completed": completed,
+            "unfinished": len(pending),
+            # Both rates are over the arrival window, so the drain tail and Poisson variance in the
+            # number of arrivals do not count against the stage
+            "offered": arrivals / arrival_window if arrival_window else 0.0,
+            "throughput": completed / arrival_window if arrival_window else 0.0,
+            "results": results,
+            "lag": lag_samples,
+        }
+
+    def is_saturated(self, stage):
+        acks = [ack for result in stage["results"].values() for ack in result["ack"]]
+        latencies = [latency for result in stage["results"].values() for latency in result["latency"]]
+        missed = sum(1 for ack in acks if ack > ACK_WINDOW_SECONDS)
+        if stage["unfinished"] or (acks and missed / len(acks) > self.args.max_miss_ratio):
+            return True
+        if percentile(latencies, 0.99) > self.args.max_p99:
+            return True
+        return stage["completed"] < stage["arrivals"] * 0.9
+
+    def report_stage(self, stage):
+        print(f"\n=== Offered rate {stage['rate']:.1f}/s ({stage['offered']:.1f}/s measured): {stage['arrivals']} arrivals, "
+              f"{stage['completed']} completed, {stage['unfinished']} unfinished, "
+              f"throughput {stage['throughput']:.1f}/s ===")
+        print(f"{'scenario':<22}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ack p99':>10}{'ack>3s':>8}")
+        for name, result in stage["results"].items():
+            latencies = result["latency"]
+            acks = result["ack"]
+            missed = sum(1 for ack in acks if ack > ACK_WINDOW_SECONDS)
+            print(f"{name:<22}{len(latencies):>7}{result['errors']:>5}"
+                  f"{percentile(latencies, 0.50) * 1000:>10.1f}"
+                  f"{percentile(latencies, 0.95) * 1000:>10.1f}"
+                  f"{percentile(latencies, 0.99) * 1000:>10.1f}"
+                  f"{(max(latencies) if latencies else 0) * 1000:>10.1f}"
+                  f"{percentile(acks, 0.99) * 1000 if acks else 0:>10.1f}"
+                  f"{missed:>8}")
+        lag = stage["lag"]
+        print(f"event-loop lag: p50 {percentile(lag, 0.50) * 1000:.1f} ms, "
+              f"p99 {percentile(lag, 0.99) * 1000:.1f} ms, "
+              f"max {(max(lag) if lag else 0) * 1000:.1f} ms "
+              f"(mean {statistics.fmean(lag) * 1000 if lag else 0:.1f} ms)")
+
+    async def run(self):
+        print(f"Seeded {self.args.seed_rows} rows per people list, {len(self.known_ids)} known IDs, "
+              f"{self.args.voters} voters, {self.args.members} members")
+        saturation = None
+        flusher = asyncio.create_task(obrc.outbox.run())
+        if not self.args.no_change_feed:
+            loop = asyncio.get_running_loop()
+            self.db.listeners.append(lambda *event: loop.call_soon_threadsafe(obrc.list_store.apply, *event))
+            with contextlib.redirect_stdout(sys.stderr if self.args.verbose else io.StringIO()):
+                await obrc.list_store.sync()
+        for rate in self.args.rates:
+            sink = io.StringIO()
+            with contextlib.redirect_stdout(sink if not self.args.verbose else sys.stdout):
+                stage = await self.run_stage(rate)
+            self.report_stage(stage)
+            print(f"storage calls so far: {self.db.calls}, REST calls so far: {sum(self.gateway.rest_calls.values())}")
+            if self.is_saturated(stage):
+                saturation = rate
+                break
+
+        print()
+        if saturation is None:
+            print(f"No saturation up to {self.args.rates[-1]:.1f} interactions/s")
+        else:
+            print(f"Saturation point: {saturation:.1f} interactions/s "
+                  f"(ack >{ACK_WINDOW_SECONDS:.0f}s ratio above {self.args.max_miss_ratio:.0%}, "
+                  f"p99 above {self.args.max_p99:.1f}s or under 90% of arrivals completed)")
+
+        flusher.cancel()
+        await obrc.outbox.flush()
+
+        if self.args.metrics:
+            print()
+            print(obrc.metrics.render())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive OBRC bot command callbacks and event handlers under load")
+    parser.add_argument("--rates", type=lambda value: [float(rate) for rate in value.split(",")], default=[2, 5, 10, 20, 50, 100],
+                        help="Comma-separated offered rates (interactions/s), run in increasing order until saturation")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate stage")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait for in-flight work after a stage")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Rows seeded into blacklist and greylist")
+    parser.add_argument("--hit-ratio", type=float, default=0.1, help="Fraction of lookups that target a listed ID")
+    parser.add_argument("--voters", type=int, default=15)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="Simulated blocking latency per storage call")
+    parser.add_argument("--rest-latency-ms", type=float, default=50.0, help="Simulated latency per Discord REST call")
+    parser.add_argument("--sleep-scale", type=float, default=0.01, help="Scale applied to asyncio.sleep inside the bot module")
+    parser.add_argument("--mix-search", type=float, default=60)
+    parser.add_argument("--mix-propose", type=float, default=5)
+    parser.add_argument("--mix-join", type=float, default=25)
+    parser.add_argument("--mix-vote", type=float, default=9)
+    parser.add_argument("--mix-expire", type=float, default=1)
+    parser.add_argument("--max-p99", type=float, default=ACK_WINDOW_SECONDS, help="p99 end-to-end seconds considered saturated")
+    parser.add_argument("--max-miss-ratio", type=float, default=0.01, help="Fraction of acks beyond 3s considered saturated")
+    parser.add_argument("--no-change-feed", action="store_true", help="Leave the in-memory list store unsynced so lookups query storage")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Show bot output and harness errors")
+    parser.add_argument("--metrics", action="store_true", help="Print the bot's Prometheus metrics after the run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    harness = LoadHarness(args)
+    asyncio.run(harness.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,54 @@
-import discord
-from discord.ext import commands
-from discord import app_commands
-import json
-from dotenv import load_dotenv
-import os
-import asyncio
-import math
-from datetime import datetime, timedelta
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import io
-from supabase import create_client, Client
+import contextlib
+import time
+STARTUP_STARTED = time.perf_counter()
+import_timings = {}
+
+@contextlib.contextmanager
+def timed_import(name):
+    """Record how long the imports in the block took, for the startup report."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        import_timings[name] = time.perf_counter() - started
+
+with timed_import("discord"):
+    import discord
+    from discord.ext import commands
+    from discord import app_commands
+with timed_import("dotenv"):
+    from dotenv import load_dotenv
+with timed_import("stdlib"):
+    import json
+    import os
+    import asyncio
+    import bisect
+    import contextvars
+    import functools
+    import hashlib
+    import math
+    import re
+    import socket
+    import sqlite3
+    import sys
+    import threading
+    import traceback
+    from array import array
+    from collections import deque
+    from datetime import datetime, timedelta, timezone
+    import io
+    import itertools
+    import multiprocessing
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from collections import OrderedDict
+with timed_import("postgrest"):
+    from postgrest.exceptions import APIError
+with timed_import("supabase"):
+    from supabase import create_client
+with timed_import("obrc_export"):
+    import obrc_export
+IMPORTS_FINISHED = time.perf_counter()
 
 load_dotenv("cred.env")
 
@@ -22,7 +59,1054 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+current_handler = contextvars.ContextVar("current_handler", default="none")
+handler_storage_calls = contextvars.ContextVar("handler_storage_calls", default=None)
+current_interaction = contextvars.ContextVar("current_interaction", default=None)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+    
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.descriptions = {}
+        self.server = None
+    
+    def _key(self, name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+    
+    def describe(self, name, kind, text):
+        self.descriptions[name] = (kind, text)
+    
+    def inc(self, name, labels=None, amount=1):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def set_gauge(self, name, value, labels=None):
+        self.gauges[self._key(name, labels)] = value
+    
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+    
+    def _format_labels(self, labels, extra=None):
+        items = list(labels) + list(extra or [])
+        if not items:
+            return ""
+        escaped = [(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in items]
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+    
+    def render(self):
+        lines = []
+        described = set()
+        
+        def header(name, default_kind):
+            if name in described:
+                return
+            described.add(name)
+            kind, text = self.descriptions.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            header(name, "histogram")
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"{name}_bucket{self._format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {histogram.total}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {histogram.total}")
+        
+        return "\n".join(lines) + "\n"
+    
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if not line or line in (b"\r\n", b"\n"):
+                    break
+            
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = self.render().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+                content_type = "text/plain; charset=utf-8"
+            
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            print(f"Error serving metrics request: {e}")
+        finally:
+            writer.close()
+    
+    async def start_server(self, host, port):
+        self.server = await asyncio.start_server(self._handle_http, host, port)
+        print(f"📈 Metrics endpoint listening on http://{host}:{port}/metrics")
+        return self.server
+
+metrics = MetricsRegistry()
+metrics.describe("obrc_handler_duration_seconds", "histogram", "Duration of slash commands, event handlers and background tasks")
+metrics.describe("obrc_handler_errors_total", "counter", "Unhandled exceptions raised by slash commands, event handlers and background tasks")
+metrics.describe("obrc_handler_storage_calls", "histogram", "Supabase calls made per handler invocation")
+metrics.describe("obrc_storage_requests_total", "counter", "Supabase requests by table, operation, handler and result")
+metrics.describe("obrc_storage_request_duration_seconds", "histogram", "Supabase request duration by table and operation")
+metrics.describe("obrc_discord_rest_requests_total", "counter", "Discord REST requests by method, route and result")
+metrics.describe("obrc_discord_rest_request_duration_seconds", "histogram", "Discord REST request duration by method and route")
+metrics.describe("obrc_voter_notifications_total", "counter", "Voter notification DMs by result")
+metrics.describe("obrc_startup_seconds", "gauge", "Time from module load to the first on_ready by startup phase")
+metrics.describe("obrc_import_seconds", "gauge", "Time spent importing each top-level dependency at startup")
+metrics.describe("obrc_resident_memory_bytes", "gauge", "Resident set size of the bot process when it became ready")
+
+EXPORT_DEPENDENCIES = ("pandas", "gspread", "google.auth", "openpyxl", "pyarrow")
+startup_reported = False
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+def report_startup():
+    """Print and export how long startup took; only the first on_ready counts."""
+    global startup_reported
+    if startup_reported:
+        return
+    startup_reported = True
+    
+    ready = time.perf_counter()
+    phases = {
+        "imports": IMPORTS_FINISHED - STARTUP_STARTED,
+        "connect": ready - IMPORTS_FINISHED,
+        "total": ready - STARTUP_STARTED,
+    }
+    for phase, seconds in phases.items():
+        metrics.set_gauge("obrc_startup_seconds", seconds, {"phase": phase})
+    for module, seconds in import_timings.items():
+        metrics.set_gauge("obrc_import_seconds", seconds, {"module": module})
+    rss = current_rss_bytes()
+    if rss is not None:
+        metrics.set_gauge("obrc_resident_memory_bytes", rss)
+    
+    loaded = [name for name in EXPORT_DEPENDENCIES if name in sys.modules]
+    print(
+        f"⏱️ Startup: imports {phases['imports'] * 1000:.0f}ms, "
+        f"login to ready {phases['connect'] * 1000:.0f}ms, total {phases['total'] * 1000:.0f}ms"
+        + (f", RSS {rss / 1048576:.1f}MB" if rss is not None else "")
+    )
+    breakdown = sorted(import_timings.items(), key=lambda item: item[1], reverse=True)
+    print("📦 Import cost: " + ", ".join(f"{module} {seconds * 1000:.0f}ms" for module, seconds in breakdown))
+    print(f"📦 Export dependencies loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+instrumented_handlers = set()
+
+def instrumented(kind, name):
+    instrumented_handlers.add(name)
+    
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            handler_token = current_handler.set(name)
+            task = asyncio.current_task()
+            task_name = task.get_name() if task else None
+            if task:
+                task.set_name(f"{kind}:{name}")
+            calls = [0]
+            calls_token = handler_storage_calls.set(calls)
+            interaction_token = current_interaction.set(args[0] if kind == "command" and args else None)
+            labels = {"kind": kind, "name": name}
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                metrics.inc("obrc_handler_errors_total", labels)
+                raise
+            finally:
+                metrics.observe("obrc_handler_duration_seconds", time.perf_counter() - started, labels)
+                metrics.observe("obrc_handler_storage_calls", calls[0], labels, buckets=CALL_COUNT_BUCKETS)
+                handler_storage_calls.reset(calls_token)
+                current_interaction.reset(interaction_token)
+                current_handler.reset(handler_token)
+                if task:
+                    task.set_name(task_name)
+                sampling_profiler.record_invocation(name)
+        return wrapper
+    return decorator
+
+LOOP_LAG_MONITOR = os.getenv("LOOP_LAG_MONITOR", "0") == "1"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "3000"))
+INSTRUMENTATION_FRAMES = ("wrapper", "call", "execute")
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class LoopLagMonitor:
+    def __init__(self, interval=LOOP_LAG_INTERVAL, threshold=LOOP_LAG_THRESHOLD, window=LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = deque(maxlen=window)
+        self.stalls = deque(maxlen=20)
+        self.loop = None
+        self.loop_thread_id = None
+        self.last_tick = None
+        self.captured_tick = None
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+    
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+    
+    def start(self):
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.stopped.clear()
+        self.task = self.loop.create_task(self._tick(), name="task:loop_lag_monitor")
+        self.thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self.thread.start()
+        print(f"⏱️ Event-loop lag monitor started (threshold {self.threshold * 1000:.0f} ms)")
+    
+    def stop(self):
+        self.stopped.set()
+        if self.task:
+            self.task.cancel()
+    
+    async def _tick(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_tick = now
+            self.samples.append(lag)
+            metrics.observe("obrc_event_loop_lag_seconds", lag, buckets=LOOP_LAG_BUCKETS)
+            
+            if self.stalls and self.stalls[-1]["tick"] == self.captured_tick and self.stalls[-1]["duration"] is None:
+                stall = self.stalls[-1]
+                stall["duration"] = lag
+                print(f"⏱️ Event loop resumed after {lag * 1000:.0f} ms stall in {stall['task']} ({stall['culprit']})")
+    
+    def _watch(self):
+        while not self.stopped.wait(self.threshold / 2):
+            last_tick = self.last_tick
+            stalled_for = time.monotonic() - last_tick - self.interval
+            if stalled_for < self.threshold or self.captured_tick == last_tick:
+                continue
+            
+            self.captured_tick = last_tick
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            
+            stack = traceback.extract_stack(frame)
+            task = asyncio.current_task(self.loop)
+            task_name = task.get_name() if task else "callback"
+            culprit = stack[-1]
+            own_frames = [entry for entry in stack if entry.filename == __file__ and entry.name not in INSTRUMENTATION_FRAMES]
+            call_site = own_frames[-1] if own_frames else culprit
+            
+            stall = {
+                "tick": last_tick,
+                "at": datetime.utcnow(),
+                "task": task_name,
+                "culprit": f"{os.path.basename(culprit.filename)}:{culprit.lineno} in {culprit.name}",
+                "call_site": f"line {call_site.lineno} in {call_site.name}",
+                "stack": "".join(traceback.format_list(stack[-15:])),
+                "duration": None,
+            }
+            self.stalls.append(stall)
+            metrics.inc("obrc_event_loop_stalls_total", {"task": task_name})
+            print(f"⚠️ Event loop blocked for {stalled_for * 1000:.0f} ms in {task_name}; "
+                  f"blocking call {stall['culprit']} (called from {stall['call_site']})\n{stall['stack']}")
+    
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+    
+    def histogram(self):
+        counts = [0] * (len(LOOP_LAG_BUCKETS) + 1)
+        for sample in self.samples:
+            for index, bound in enumerate(LOOP_LAG_BUCKETS):
+                if sample <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+loop_lag_monitor = LoopLagMonitor()
+metrics.describe("obrc_event_loop_lag_seconds", "histogram", "Event-loop scheduling lag sampled by the lag monitor")
+metrics.describe("obrc_event_loop_stalls_total", "counter", "Event-loop stalls above the lag threshold by running task")
+
+def is_admin(user):
+    permissions = getattr(user, "guild_permissions", None)
+    return bool(permissions and permissions.administrator)
+
+TASK_RESTART_BACKOFF = float(os.getenv("TASK_RESTART_BACKOFF", "5"))
+TASK_RESTART_MAX_BACKOFF = float(os.getenv("TASK_RESTART_MAX_BACKOFF", "300"))
+
+class TaskSupervisor:
+    """Runs long-lived background loops once per process and restarts them when they crash."""
+    
+    def __init__(self, backoff=TASK_RESTART_BACKOFF, max_backoff=TASK_RESTART_MAX_BACKOFF):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.tasks = {}
+        self.restarts = {}
+    
+    def start(self, name, factory):
+        task = self.tasks.get(name)
+        if task and not task.done():
+            return task
+        self.tasks[name] = asyncio.get_running_loop().create_task(self._supervise(name, factory), name=f"task:{name}")
+        return self.tasks[name]
+    
+    async def _supervise(self, name, factory):
+        delay = self.backoff
+        while True:
+            started = time.monotonic()
+            try:
+                await factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                print(f"❌ Background task {name} crashed, restarting in {delay:.0f}s")
+                traceback.print_exc()
+            
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            metrics.inc("obrc_background_task_restarts_total", {"task": name})
+            if time.monotonic() - started > self.max_backoff:
+                delay = self.backoff
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+    
+    async def stop(self):
+        tasks = [task for task in self.tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+
+task_supervisor = TaskSupervisor()
+metrics.describe("obrc_background_task_restarts_total", "counter", "Background task crashes that were restarted by the supervisor")
+
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_MAX_DURATION = 600
+PROFILE_MAX_INVOCATIONS = 1000
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.session = None
+    
+    @property
+    def active(self):
+        return self.session is not None
+    
+    def _matches(self, task_name, target):
+        return task_name == target or task_name.endswith(f":{target}")
+    
+    def record_invocation(self, name):
+        session = self.session
+        if not session or session["invocation_limit"] is None or not self._matches(name, session["target"]):
+            return
+        session["invocations"] += 1
+        if session["invocations"] >= session["invocation_limit"]:
+            session["done"].set()
+    
+    def _sample(self, session):
+        loop = session["loop"]
+        thread_id = session["thread_id"]
+        while not session["stopped"].wait(self.interval):
+            session["total_samples"] += 1
+            task = asyncio.current_task(loop)
+            if task is None or not self._matches(task.get_name(), session["target"]):
+                continue
+            
+            frame = sys._current_frames().get(thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if not frames:
+                continue
+            
+            stack = ";".join(reversed(frames))
+            session["stacks"][stack] = session["stacks"].get(stack, 0) + 1
+            session["leaves"][frames[0]] = session["leaves"].get(frames[0], 0) + 1
+            session["matched_samples"] += 1
+    
+    async def profile(self, target, duration, invocation_limit=None):
+        if self.active:
+            raise RuntimeError(f"A profiling session for {self.session['target']} is already running")
+        
+        session = {
+            "target": target,
+            "loop": asyncio.get_running_loop(),
+            "thread_id": threading.get_ident(),
+            "invocation_limit": invocation_limit,
+            "invocations": 0,
+            "total_samples": 0,
+            "matched_samples": 0,
+            "stacks": {},
+            "leaves": {},
+            "done": asyncio.Event(),
+            "stopped": threading.Event(),
+            "started": time.monotonic(),
+        }
+        self.session = session
+        sampler = threading.Thread(target=self._sample, args=(session,), name="sampling-profiler", daemon=True)
+        sampler.start()
+        try:
+            try:
+                await asyncio.wait_for(session["done"].wait(), timeout=duration)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            session["stopped"].set()
+            await asyncio.to_thread(sampler.join)
+            session["elapsed"] = time.monotonic() - session["started"]
+            self.session = None
+        return session
+    
+    def collapsed(self, session):
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(session["stacks"].items(), key=lambda item: -item[1])) + "\n"
+
+sampling_profiler = SamplingProfiler()
+
+STORAGE_OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+STORAGE_TIMEOUT = float(os.getenv("STORAGE_TIMEOUT", "10"))
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "8"))
+STORAGE_BREAKER_THRESHOLD = int(os.getenv("STORAGE_BREAKER_THRESHOLD", "5"))
+STORAGE_BREAKER_RESET = float(os.getenv("STORAGE_BREAKER_RESET", "30"))
+STORAGE_FALLBACK_ENTRIES = int(os.getenv("STORAGE_FALLBACK_ENTRIES", "512"))
+STORAGE_FALLBACK_MAX_AGE = float(os.getenv("STORAGE_FALLBACK_MAX_AGE", "900"))
+INTERACTION_ACK_SECONDS = 3
+INTERACTION_TOKEN_SECONDS = 900
+INTERACTION_REPLY_MARGIN = 1.0
+STORAGE_OUTAGE_SQLSTATES = ("08", "53", "57P")
+
+class StorageUnavailable(Exception):
+    pass
+
+class StorageTimeout(StorageUnavailable):
+    pass
+
+def storage_deadline():
+    """Seconds the next storage call may take, and whether the interaction budget (not STORAGE_TIMEOUT) set it.
+    
+    Before the interaction is acknowledged the budget is what is left of Discord's 3 second ack window,
+    afterwards what is left of the 15 minute followup token, minus a margin to send the reply.
+    """
+    interaction = current_interaction.get()
+    created_at = getattr(interaction, "created_at", None)
+    if created_at is None:
+        return STORAGE_TIMEOUT, False
+    
+    window = INTERACTION_TOKEN_SECONDS if interaction.response.is_done() else INTERACTION_ACK_SECONDS
+    remaining = window - (discord.utils.utcnow() - created_at).total_seconds() - INTERACTION_REPLY_MARGIN
+    if remaining < STORAGE_TIMEOUT:
+        return remaining, True
+    return STORAGE_TIMEOUT, False
+
+def storage_outage(error):
+    """Whether a PostgREST APIError means Supabase is unhealthy rather than that the request was refused.
+    
+    Errors without a JSON body carry the HTTP status as their code, so a 5xx from the gateway counts,
+    as do PostgREST's PGRST0xx connection errors and the Postgres connection, resource and shutdown
+    SQLSTATE classes. A missing code means the body did not come from PostgREST (which always sets one).
+    4xx statuses and other codes (constraint violations, bad filters) are healthy round trips.
+    """
+    code = str(error.code or "")
+    if not code:
+        return True
+    if len(code) == 3 and code.isdigit():
+        return int(code) >= 500
+    return code.startswith("PGRST0") or code.startswith(STORAGE_OUTAGE_SQLSTATES)
+
+class CircuitBreaker:
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+    
+    def __init__(self, name, threshold=STORAGE_BREAKER_THRESHOLD, reset_after=STORAGE_BREAKER_RESET):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+        metrics.set_gauge("obrc_storage_breaker_state", 0, {"breaker": name})
+    
+    def _transition(self, state):
+        if state == self.state:
+            return
+        print(f"🔌 Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        metrics.set_gauge("obrc_storage_breaker_state", self.STATES[state], {"breaker": self.name})
+        metrics.inc("obrc_storage_breaker_transitions_total", {"breaker": self.name, "state": state})
+    
+    def allow(self):
+        """Whether a call may go out; once the reset period has passed an open breaker lets a single probe through.
+        
+        A half-open breaker whose probe never reported back (cancelled, or cut short by the interaction
+        budget) lets another probe through after the same period instead of staying half-open forever.
+        """
+        with self.lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_after:
+                self.opened_at = now
+                self._transition("half_open")
+                return True
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self._transition("closed")
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self._transition("open")
+    
+    def record_inconclusive(self):
+        """A call ended without saying anything about the backend; a probe that does so re-opens the breaker."""
+        with self.lock:
+            if self.state == "half_open":
+                self.opened_at = time.monotonic()
+                self._transition("open")
+
+class StorageFallbackCache:
+    """Last good response per read query, served while Supabase is failing or the breaker is open."""
+    
+    def __init__(self, max_entries=STORAGE_FALLBACK_ENTRIES, max_age=STORAGE_FALLBACK_MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.max_age:
+                return None
+            return entry[1]
+    
+    def put(self, key, response):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+storage_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+storage_breaker = CircuitBreaker("supabase")
+storage_fallback = StorageFallbackCache()
+metrics.describe("obrc_storage_breaker_state", "gauge", "Storage circuit breaker state (0 closed, 1 half-open, 2 open)")
+metrics.describe("obrc_storage_breaker_transitions_total", "counter", "Storage circuit breaker state changes")
+metrics.describe("obrc_storage_timeouts_total", "counter", "Supabase requests abandoned at their deadline, by table, operation and deadline source")
+metrics.describe("obrc_storage_fallbacks_total", "counter", "Reads answered from the fallback cache because Supabase was unavailable")
+
+class InstrumentedQuery:
+    def __init__(self, builder, table_name, operation="select", chain=()):
+        self._builder = builder
+        self._table_name = table_name
+        self._operation = operation
+        self._chain = chain
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._builder, name)
+        if not callable(attribute):
+            return attribute
+        
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            operation = name if name in STORAGE_OPERATIONS else self._operation
+            chain = self._chain + ((name, repr(args), repr(sorted(kwargs.items()))),)
+            return InstrumentedQuery(result, self._table_name, operation, chain)
+        return call
+    
+    def _fallback(self, error, labels):
+        if self._operation == "select":
+            cached = storage_fallback.get((self._table_name, self._chain))
+            if cached is not None:
+                metrics.inc("obrc_storage_fallbacks_total", labels)
+                print(f"⚠️ Serving cached {self._table_name} read: {error}")
+                return cached
+        raise error
+    
+    async def execute(self):
+        labels = {"table": self._table_name, "operation": self._operation}
+        calls = handler_storage_calls.get()
+        if calls is not None:
+            calls[0] += 1
+        
+        timeout, budget_limited = storage_deadline()
+        result = "error"
+        started = time.perf_counter()
+        try:
+            if timeout <= 0:
+                result = "timeout"
+                metrics.inc("obrc_storage_timeouts_total", {**labels, "deadline": "interaction"})
+                return self._fallback(StorageTimeout(f"interaction budget spent before {self._operation} on {self._table_name}"), labels)
+            if not storage_breaker.allow():
+                result = "rejected"
+                return self._fallback(StorageUnavailable(f"circuit breaker open, skipped {self._operation} on {self._table_name}"), labels)
+            
+            future = storage_executor.submit(self._builder.execute)
+            try:
+                response = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                # Only stops a request still queued for a worker; one already sent is left to finish
+                future.cancel()
+                result = "timeout"
+                metrics.inc("obrc_storage_timeouts_total", {**labels, "deadline": "interaction" if budget_limited else "storage"})
+                if budget_limited:
+                    storage_breaker.record_inconclusive()
+                else:
+                    storage_breaker.record_failure()
+                return self._fallback(StorageTimeout(f"{self._operation} on {self._table_name} exceeded {timeout:.1f}s"), labels)
+            except asyncio.CancelledError:
+                future.cancel()
+                storage_breaker.record_inconclusive()
+                raise
+            except APIError as e:
+                if not storage_outage(e):
+                    storage_breaker.record_success()
+                    raise
+                storage_breaker.record_failure()
+                return self._fallback(e, labels)
+            except Exception as e:
+                storage_breaker.record_failure()
+                return self._fallback(e, labels)
+            
+            result = "ok"
+            storage_breaker.record_success()
+            if self._operation == "select":
+                storage_fallback.put((self._table_name, self._chain), response)
+            return response
+        finally:
+            metrics.observe("obrc_storage_request_duration_seconds", time.perf_counter() - started, labels)
+            metrics.inc("obrc_storage_requests_total", {**labels, "handler": current_handler.get(), "result": result})
+
+class InstrumentedSupabase:
+    def __init__(self, client):
+        self._client = client
+    
+    def table(self, table_name):
+        return InstrumentedQuery(self._client.table(table_name), table_name)
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+def instrument_http(client):
+    original_request = client.http.request
+    
+    async def request(route, **kwargs):
+        labels = {"method": route.method, "route": route.path}
+        result = "error"
+        started = time.perf_counter()
+        try:
+            response = await original_request(route, **kwargs)
+            result = "ok"
+            return response
+        except discord.HTTPException as e:
+            result = str(e.status)
+            raise
+        finally:
+            metrics.observe("obrc_discord_rest_request_duration_seconds", time.perf_counter() - started, labels)
+            metrics.inc("obrc_discord_rest_requests_total", {**labels, "result": result})
+    
+    client.http.request = request
+
+PRIORITY_ROLES = 0
+PRIORITY_RESULTS = 1
+PRIORITY_DMS = 2
+PRIORITY_BULK = 3
+PRIORITY_NAMES = {PRIORITY_ROLES: "roles", PRIORITY_RESULTS: "results", PRIORITY_DMS: "dms", PRIORITY_BULK: "bulk"}
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "4"))
+OUTBOUND_ROUTE_CONCURRENCY = int(os.getenv("OUTBOUND_ROUTE_CONCURRENCY", "2"))
+OUTBOUND_ROUTE_LIMITS = {"dm": int(os.getenv("OUTBOUND_DM_CONCURRENCY", "1"))}
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+
+class OutboundAction:
+    def __init__(self, priority, route, factory, future):
+        self.priority = priority
+        self.route = route
+        self.factory = factory
+        self.future = future
+        self.queued_at = time.perf_counter()
+    
+    @property
+    def route_class(self):
+        return self.route.split(":", 1)[0]
+
+class OutboundQueue:
+    """Single outbound path for bot-initiated Discord writes.
+    
+    Actions run highest priority first on a small worker pool. An action whose route is already at
+    its concurrency limit is parked until that route frees up, so one busy route (a DM or transcript
+    burst) never holds workers that a role change could use.
+    """
+    
+    def __init__(self, workers=OUTBOUND_WORKERS):
+        self.worker_count = workers
+        self.loop = None
+        self.queue = None
+        self.workers = []
+        self.sequence = itertools.count()
+        self.in_flight = {}
+        self.parked = {}
+        self.depth = {priority: 0 for priority in PRIORITY_NAMES}
+    
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.PriorityQueue()
+            self.workers = []
+            self.in_flight = {}
+            self.parked = {}
+            self.depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        while len(self.workers) < self.worker_count:
+            self.workers.append(asyncio.create_task(self._worker(), name="task:outbound_worker"))
+    
+    def _set_depth(self, priority, delta):
+        self.depth[priority] += delta
+        metrics.set_gauge("obrc_outbound_queue_depth", self.depth[priority], {"priority": PRIORITY_NAMES[priority]})
+    
+    async def submit(self, priority, route, factory):
+        """Queue `factory()` (a coroutine function) and wait for its result."""
+        self._ensure_workers()
+        action = OutboundAction(priority, route, factory, asyncio.get_running_loop().create_future())
+        self._set_depth(priority, 1)
+        self.queue.put_nowait((priority, next(self.sequence), action))
+        return await action.future
+    
+    def _route_limit(self, action):
+        return OUTBOUND_ROUTE_LIMITS.get(action.route_class, OUTBOUND_ROUTE_CONCURRENCY)
+    
+    async def _worker(self):
+        while True:
+            entry = await self.queue.get()
+            action = entry[2]
+            if action.future.cancelled():
+                self._set_depth(action.priority, -1)
+                continue
+            if self.in_flight.get(action.route, 0) >= self._route_limit(action):
+                self.parked.setdefault(action.route, []).append(entry)
+                continue
+            
+            self.in_flight[action.route] = self.in_flight.get(action.route, 0) + 1
+            self._set_depth(action.priority, -1)
+            metrics.observe("obrc_outbound_wait_seconds", time.perf_counter() - action.queued_at, {"priority": PRIORITY_NAMES[action.priority]})
+            try:
+                await self._execute(action)
+            finally:
+                self.in_flight[action.route] -= 1
+                parked = self.parked.get(action.route)
+                if parked:
+                    parked.sort()
+                    self.queue.put_nowait(parked.pop(0))
+    
+    async def _execute(self, action):
+        labels = {"priority": PRIORITY_NAMES[action.priority]}
+        for attempt in range(OUTBOUND_MAX_RETRIES + 1):
+            try:
+                result = await action.factory()
+            except (discord.HTTPException, discord.RateLimited) as e:
+                status = getattr(e, "status", 429)
+                if status != 429 or attempt == OUTBOUND_MAX_RETRIES:
+                    metrics.inc("obrc_outbound_actions_total", {**labels, "result": str(status)})
+                    if not action.future.done():
+                        action.future.set_exception(e)
+                    return
+                retry_after = getattr(e, "retry_after", None) or 2 ** attempt
+                metrics.inc("obrc_outbound_retries_total", labels)
+                await asyncio.sleep(retry_after)
+            except Exception as e:
+                metrics.inc("obrc_outbound_actions_total", {**labels, "result": "error"})
+                if not action.future.done():
+                    action.future.set_exception(e)
+                return
+            else:
+                metrics.inc("obrc_outbound_actions_total", {**labels, "result": "ok"})
+                if not action.future.done():
+                    action.future.set_result(result)
+                return
+
+outbound = OutboundQueue()
+metrics.describe("obrc_outbound_queue_depth", "gauge", "Outbound Discord actions waiting to run, by priority")
+metrics.describe("obrc_outbound_wait_seconds", "histogram", "Time outbound Discord actions spent queued, by priority")
+metrics.describe("obrc_outbound_actions_total", "counter", "Outbound Discord actions by priority and result")
+metrics.describe("obrc_outbound_retries_total", "counter", "Outbound Discord actions retried after a 429")
+
+supabase = InstrumentedSupabase(create_client(SUPABASE_URL, SUPABASE_KEY))
+
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "obrc_outbox.sqlite3")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_COALESCE_WINDOW = float(os.getenv("OUTBOX_COALESCE_WINDOW", "0.25"))
+OUTBOX_CLAIM_SECONDS = float(os.getenv("OUTBOX_CLAIM_SECONDS", "300"))
+OUTBOX_RETRY_POLL = 5
+OUTBOX_BACKOFF = 1
+OUTBOX_MAX_BACKOFF = 60
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "50"))
+
+class WriteOutbox:
+    """Write-behind journal for idempotent Supabase upserts.
+    
+    Writes are committed to a local SQLite journal and acknowledged straight away. A background
+    flusher claims due entries, turning runs of upserts to the same table into one batched call,
+    and retries with exponential backoff. Ordering only holds per row (table plus conflict key):
+    an entry that is failing holds back later writes to the same row and nothing else. Entries
+    that keep failing are kept as dead letters.
+    
+    Several processes may share the journal; claims are taken in a transaction and expire after
+    OUTBOX_CLAIM_SECONDS, so entries left by a process that died are picked up by another.
+    """
+    
+    COLUMNS = {"ordering_key": "TEXT", "claimed_by": "TEXT", "claimed_until": "REAL"}
+    
+    def __init__(self, path=OUTBOX_PATH, owner=None):
+        self.path = path
+        self.owner = owner or WORKER_ID
+        self.db = None
+        self.lock = threading.Lock()
+        self.wakeup = None
+        self.pending = 0
+        self.dead = 0
+    
+    def _connect(self):
+        if self.db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, operation TEXT NOT NULL, "
+                "payload TEXT NOT NULL, match TEXT, on_conflict TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt REAL NOT NULL DEFAULT 0, last_error TEXT, dead INTEGER NOT NULL DEFAULT 0)"
+            )
+            existing = {row[1] for row in db.execute("PRAGMA table_info(outbox)")}
+            for column, kind in self.COLUMNS.items():
+                if column not in existing:
+                    db.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+            db.execute("CREATE INDEX IF NOT EXISTS outbox_ordering ON outbox (ordering_key, id)")
+            self.db = db
+            self._count()
+        return self.db
+    
+    def _append(self, table, payload, on_conflict):
+        ordering_key = f"{table}:{on_conflict}={payload.get(on_conflict)}"
+        with self.lock:
+            self._connect().execute(
+                "INSERT INTO outbox (table_name, operation, payload, on_conflict, ordering_key) VALUES (?, 'upsert', ?, ?, ?)",
+                (table, json.dumps(payload, default=str), on_conflict, ordering_key)
+            )
+            self.pending += 1
+    
+    async def upsert(self, table, row, on_conflict="id"):
+        """Journal an upsert; on_conflict must be a key the caller generated, so a replay cannot duplicate the row."""
+        await asyncio.to_thread(self._append, table, row, on_conflict)
+        metrics.inc("obrc_outbox_writes_total", {"table": table, "operation": "upsert"})
+        self._update_gauges()
+        if self.wakeup:
+            self.wakeup.set()
+    
+    def _count(self):
+        counts = dict(self.db.execute("SELECT dead, COUNT(*) FROM outbox GROUP BY dead").fetchall())
+        self.pending, self.dead = counts.get(0, 0), counts.get(1, 0)
+    
+    def _update_gauges(self):
+        metrics.set_gauge("obrc_outbox_pending", self.pending)
+        metrics.set_gauge("obrc_outbox_dead_letters", self.dead)
+    
+    def _claim(self):
+        """Claim up to OUTBOX_BATCH_SIZE due entries whose row has no earlier entry held back or claimed elsewhere."""
+        now = time.time()
+        with self.lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                entries = db.execute(
+                    "SELECT id, table_name, operation, payload, match, on_conflict, attempts, next_attempt, ordering_key "
+                    "FROM outbox AS entry WHERE dead = 0 AND next_attempt <= ? "
+                    "AND (claimed_until IS NULL OR claimed_until <= ? OR claimed_by = ?) "
+                    "AND NOT EXISTS (SELECT 1 FROM outbox AS earlier WHERE earlier.ordering_key = entry.ordering_key "
+                    "AND earlier.id < entry.id AND earlier.dead = 0 AND (earlier.next_attempt > ? "
+                    "OR (earlier.claimed_until > ? AND earlier.claimed_by != ?))) "
+                    "ORDER BY id LIMIT ?",
+                    (now, now, self.owner, now, now, self.owner, OUTBOX_BATCH_SIZE)
+                ).fetchall()
+                db.executemany(
+                    "UPDATE outbox SET claimed_by = ?, claimed_until = ? WHERE id = ?",
+                    [(self.owner, now + OUTBOX_CLAIM_SECONDS, entry[0]) for entry in entries]
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return entries, now + OUTBOX_CLAIM_SECONDS
+    
+    def _batches(self, entries):
+        """Group consecutive upserts to one table, starting a new batch when a row repeats.
+        
+        Postgres rejects an upsert that touches the same row twice, and the later write must win.
+        """
+        batches = []
+        for entry in entries:
+            key = entry[1], entry[5]
+            if batches and batches[-1][0] == key and entry[8] not in batches[-1][2]:
+                batches[-1][1].append(entry)
+                batches[-1][2].add(entry[8])
+            else:
+                batches.append((key, [entry], {entry[8]}))
+        return [(key, batch) for key, batch, _ in batches]
+    
+    async def _execute(self, key, entries):
+        table, on_conflict = key
+        payloads = [json.loads(entry[3]) for entry in entries]
+        return await supabase.table(table).upsert(payloads, on_conflict=on_conflict).execute()
+    
+    def _complete(self, entries):
+        with self.lock:
+            self._connect().executemany("DELETE FROM outbox WHERE id = ?", [(entry[0],) for entry in entries])
+            self.pending -= len(entries)
+    
+    def _fail(self, entry, error):
+        attempts = entry[6] + 1
+        dead = attempts >= OUTBOX_MAX_ATTEMPTS
+        next_attempt = time.time() + min(OUTBOX_MAX_BACKOFF, OUTBOX_BACKOFF * 2 ** (attempts - 1))
+        with self.lock:
+            self._connect().execute(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ?, dead = ?, claimed_by = NULL, claimed_until = NULL WHERE id = ?",
+                (attempts, next_attempt, str(error)[:500], int(dead), entry[0])
+            )
+            if dead:
+                self.pending -= 1
+                self.dead += 1
+        if dead:
+            print(f"❌ Outbox gave up on {entry[2]} to {entry[1]} ({entry[8]}) after {attempts} attempts: {error}")
+    
+    def _release(self, entries):
+        with self.lock:
+            self._connect().executemany(
+                "UPDATE outbox SET claimed_by = NULL, claimed_until = NULL WHERE id = ? AND claimed_by = ?",
+                [(entry[0], self.owner) for entry in entries]
+            )
+            self._count()
+    
+    async def _flush_batch(self, key, entries, blocked):
+        labels = {"table": key[0], "operation": "upsert"}
+        try:
+            await self._execute(key, entries)
+        except Exception as e:
+            metrics.inc("obrc_outbox_flushes_total", {**labels, "result": "error"})
+            if len(entries) == 1:
+                blocked.add(entries[0][8])
+                await asyncio.to_thread(self._fail, entries[0], e)
+                return
+            # One bad row fails the whole call; retry the rows on their own so only that row is held back
+            for entry in entries:
+                await self._flush_batch(key, [entry], blocked)
+        else:
+            metrics.inc("obrc_outbox_flushes_total", {**labels, "result": "ok"})
+            metrics.observe("obrc_outbox_batch_size", len(entries), labels, buckets=CALL_COUNT_BUCKETS)
+            await asyncio.to_thread(self._complete, entries)
+    
+    async def flush(self):
+        entries, claimed_until = await asyncio.to_thread(self._claim)
+        blocked = set()
+        skipped = []
+        try:
+            for key, batch in self._batches(entries):
+                if time.time() + STORAGE_TIMEOUT >= claimed_until:
+                    skipped.extend(batch)
+                    continue
+                ready = [entry for entry in batch if entry[8] not in blocked]
+                skipped.extend(entry for entry in batch if entry[8] in blocked)
+                if ready:
+                    await self._flush_batch(key, ready, blocked)
+        finally:
+            await asyncio.to_thread(self._release, skipped)
+            self._update_gauges()
+    
+    async def run(self):
+        self.wakeup = asyncio.Event()
+        while True:
+            await self.flush()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=OUTBOX_RETRY_POLL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await asyncio.sleep(OUTBOX_COALESCE_WINDOW)
+
+outbox = WriteOutbox()
+metrics.describe("obrc_outbox_writes_total", "counter", "Writes acknowledged into the local outbox journal")
+metrics.describe("obrc_outbox_flushes_total", "counter", "Batched outbox flushes to Supabase by table, operation and result")
+metrics.describe("obrc_outbox_batch_size", "histogram", "Journal entries coalesced into one Supabase call")
+metrics.describe("obrc_outbox_pending", "gauge", "Outbox entries waiting to be written to Supabase")
+metrics.describe("obrc_outbox_dead_letters", "gauge", "Outbox entries that exhausted their retries")
 
 
 VOTER_ROLE_ID = 1412935186219270144
@@ -34,22 +1118,108 @@ OBRC_MEMBER_NAME = "OBRC"
 COMMISSIONER_ID = 1412932287217008670
 POLL_DURATION_HOURS = 24
 EVIDENCE_VOTE_DURATION_MINUTES = 1440
-
-def get_credentials():
-    creds_str = os.getenv("GOOGLE_CREDENTIALS")
-    if not creds_str:
-        raise RuntimeError("GOOGLE_CREDENTIALS not found in environment.")
-    try:
-        creds_json = json.loads(creds_str)
-        return creds_json
-    except Exception as e:
-        raise RuntimeError(f"Failed to load GOOGLE_CREDENTIALS: {e}")
-
-def get_client():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(get_credentials(), scope)
-    client = gspread.authorize(creds)
-    return client
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "2"))
+EXPORT_MAX_PENDING = int(os.getenv("EXPORT_MAX_PENDING", "10"))
+EXPORT_PROGRESS_INTERVAL = float(os.getenv("EXPORT_PROGRESS_INTERVAL", "3"))
+DISCORD_UPLOAD_LIMIT = 10 * 1024 * 1024
+EXPORT_OUTPUT_DIR = os.getenv("EXPORT_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "obrc_exports"))
+SHEETS_AUTO_SYNC = os.getenv("SHEETS_AUTO_SYNC", "0") == "1"
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "obrc_export_cache"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+GATEWAY_PROFILE = os.getenv("GATEWAY_PROFILE", "lean").lower()
+GATEWAY_MESSAGE_CONTENT = os.getenv("GATEWAY_MESSAGE_CONTENT", "1") == "1"
+MEMBER_LOOKUP_TTL = int(os.getenv("MEMBER_LOOKUP_TTL", "600"))
+TICKET_CATEGORY_LIMIT = 50
+TICKET_OVERFLOW_CATEGORIES = int(os.getenv("TICKET_OVERFLOW_CATEGORIES", "4"))
+TICKET_BACKEND = os.getenv("TICKET_BACKEND", "channel").lower()
+TICKET_THREAD_CHANNEL_ID = int(os.getenv("TICKET_THREAD_CHANNEL_ID", "0"))
+TICKET_THREAD_ARCHIVE_MINUTES = 10080
+TICKET_LEASE_SECONDS = int(os.getenv("TICKET_LEASE_SECONDS", "900"))
+RUN_MODE = os.getenv("RUN_MODE", "all").lower()
+POLL_CHECK_INTERVAL = int(os.getenv("POLL_CHECK_INTERVAL", "300"))
+VOTER_DELIVERY_DEFAULT = os.getenv("VOTER_DELIVERY_DEFAULT", "immediate").lower()
+VOTER_DIGEST_WINDOW = int(os.getenv("VOTER_DIGEST_WINDOW", "3600"))
+VOTER_PREFERENCES_TABLE = os.getenv("VOTER_PREFERENCES_TABLE", "voter_preferences")
+
+GUILD_CONFIG_TABLE = os.getenv("GUILD_CONFIG_TABLE", "guild_config")
+
+class GuildConfig:
+    """Settings for one guild; anything missing from its storage row falls back to the module defaults."""
+    
+    def __init__(self, guild_id, row=None):
+        row = row or {}
+        defaults = {
+            "voter_role_id": VOTER_ROLE_ID,
+            "ticket_category_id": TICKET_CATEGORY_ID,
+            "transcript_channel_id": TRANSCRIPT_CHANNEL_ID,
+            "commissioner_role_id": COMMISSIONER_ID,
+            "member_role_name": OBRC_MEMBER_NAME,
+            "ticket_backend": TICKET_BACKEND,
+            "ticket_thread_channel_id": TICKET_THREAD_CHANNEL_ID,
+        }
+        self.guild_id = guild_id
+        for field, default in defaults.items():
+            value = row.get(field)
+            setattr(self, field, default if value in (None, "") else type(default)(value))
+        self.resolved = {}
+    
+    def _resolve(self, field, lookup):
+        resolved = self.resolved.get(field)
+        if resolved is None:
+            resolved = lookup(getattr(self, field))
+            if resolved is not None:
+                self.resolved[field] = resolved
+        return resolved
+    
+    def voter_role(self, guild):
+        return self._resolve("voter_role_id", guild.get_role)
+    
+    def ticket_category(self, guild):
+        return self._resolve("ticket_category_id", guild.get_channel)
+    
+    def ticket_thread_channel(self, guild):
+        return self._resolve("ticket_thread_channel_id", guild.get_channel)
+    
+    def transcript_channel(self, guild):
+        return self._resolve("transcript_channel_id", guild.get_channel)
+    
+    def is_member(self, user):
+        return any(role.name == self.member_role_name for role in getattr(user, "roles", []))
+    
+    def is_commissioner(self, user):
+        return any(role.id == self.commissioner_role_id for role in getattr(user, "roles", []))
+
+class GuildConfigStore:
+    def __init__(self):
+        self.configs = {}
+    
+    async def load(self):
+        try:
+            result = await supabase.table(GUILD_CONFIG_TABLE).select("*").execute()
+        except Exception as e:
+            print(f"⚠️ Could not load guild configuration, using defaults: {e}")
+            return
+        
+        self.configs = {
+            int(row["guild_id"]): GuildConfig(int(row["guild_id"]), row)
+            for row in result.data or []
+        }
+        print(f"🏛️ Loaded configuration for {len(self.configs)} guild(s)")
+    
+    def get(self, guild):
+        guild_id = guild.id if guild else None
+        config = self.configs.get(guild_id)
+        if config is None:
+            config = GuildConfig(guild_id)
+            self.configs[guild_id] = config
+        return config
+    
+    def invalidate(self, guild_id=None):
+        """Drop resolved role/channel objects so the next lookup sees the current cache."""
+        configs = self.configs.values() if guild_id is None else [self.configs.get(guild_id)]
+        for config in configs:
+            if config:
+                config.resolved.clear()
 
 class EvidenceVoteView(discord.ui.View):
     def __init__(self, evidence_id, timeout_seconds):
@@ -60,7 +1230,7 @@ class EvidenceVoteView(discord.ui.View):
     @discord.ui.button(label="Accept Evidence", style=discord.ButtonStyle.green, emoji="✅")
     async def accept_evidence(self, interaction: discord.Interaction, button: discord.ui.Button):
 
-        voter_role = discord.utils.get(interaction.guild.roles, id=VOTER_ROLE_ID)
+        voter_role = guild_configs.get(interaction.guild).voter_role(interaction.guild)
         if not voter_role or voter_role not in interaction.user.roles:
             await interaction.response.send_message("❌ You don't have permission to vote on evidence.", ephemeral=True)
             return
@@ -75,7 +1245,7 @@ class EvidenceVoteView(discord.ui.View):
     @discord.ui.button(label="Reject Evidence", style=discord.ButtonStyle.red, emoji="❌")
     async def reject_evidence(self, interaction: discord.Interaction, button: discord.ui.Button):
 
-        voter_role = discord.utils.get(interaction.guild.roles, id=VOTER_ROLE_ID)
+        voter_role = guild_configs.get(interaction.guild).voter_role(interaction.guild)
         if not voter_role or voter_role not in interaction.user.roles:
             await interaction.response.send_message("❌ You don't have permission to vote on evidence.", ephemeral=True)
             return
@@ -92,6 +1262,60 @@ class EvidenceVoteView(discord.ui.View):
         for item in self.children:
             item.disabled = True
 
+class ExportJobView(discord.ui.View):
+    def __init__(self, job_id):
+        super().__init__(timeout=None)
+        self.job_id = job_id
+    
+    @discord.ui.button(label="Cancel Export", style=discord.ButtonStyle.red, emoji="🛑")
+    async def cancel_export(self, interaction: discord.Interaction, button: discord.ui.Button):
+        job = export_job_manager.jobs.get(self.job_id)
+        if not job or job.finished:
+            await interaction.response.send_message("❌ This export has already finished.", ephemeral=True)
+            return
+        
+        if interaction.user.id != job.user.id and not is_admin(interaction.user):
+            await interaction.response.send_message("❌ Only the officer who started this export can cancel it.", ephemeral=True)
+            return
+        
+        await interaction.response.send_message(f"🛑 Cancelling export job #{job.id}...", ephemeral=True)
+        await export_job_manager.cancel(job)
+
+class MemberLookup:
+    """Finds members on demand when the gateway profile does not keep the full member list cached."""
+    
+    def __init__(self, ttl=MEMBER_LOOKUP_TTL):
+        self.ttl = ttl
+        self.role_members_cache = {}
+        self.locks = {}
+    
+    async def member(self, guild, user_id):
+        member = guild.get_member(int(user_id))
+        if member:
+            metrics.inc("obrc_member_lookups_total", {"source": "cache"})
+            return member
+        metrics.inc("obrc_member_lookups_total", {"source": "rest"})
+        try:
+            return await guild.fetch_member(int(user_id))
+        except discord.NotFound:
+            return None
+    
+    async def role_members(self, role):
+        guild = role.guild
+        if guild.chunked:
+            metrics.inc("obrc_member_lookups_total", {"source": "cache"})
+            return list(role.members)
+        
+        lock = self.locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            cached = self.role_members_cache.get(role.id)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            metrics.inc("obrc_member_lookups_total", {"source": "chunk"})
+            members = [member for member in await guild.chunk(cache=False) if member.get_role(role.id)]
+            self.role_members_cache[role.id] = (time.monotonic() + self.ttl, members)
+            return members
+
 class AutoRoleManager:
     def __init__(self):
 
@@ -130,7 +1354,10 @@ class AutoRoleManager:
             
 
             if roles_to_add:
-                await member.add_roles(*roles_to_add, reason="Auto-role: Blacklist detection")
+                await outbound.submit(
+                    PRIORITY_ROLES, f"member_roles:{guild.id}",
+                    lambda: member.add_roles(*roles_to_add, reason="Auto-role: Blacklist detection")
+                )
                 role_names = [role.name for role in roles_to_add]
                 print(f"Added roles to {member}: {', '.join(role_names)}")
             
@@ -138,7 +1365,10 @@ class AutoRoleManager:
 
                 roles_to_remove = [role for role in roles_to_remove if role in member.roles]
                 if roles_to_remove:
-                    await member.remove_roles(*roles_to_remove, reason="Auto-role: No longer in blacklist")
+                    await outbound.submit(
+                        PRIORITY_ROLES, f"member_roles:{guild.id}",
+                        lambda: member.remove_roles(*roles_to_remove, reason="Auto-role: No longer in blacklist")
+                    )
                     role_names = [role.name for role in roles_to_remove]
                     print(f"Removed roles from {member}: {', '.join(role_names)}")
             
@@ -148,6 +1378,17 @@ class AutoRoleManager:
             print(f"Error checking roles for {member}: {e}")
             return False
     
+    async def reconcile_member(self, guild, user_id):
+        if not guild or not str(user_id or '').isdigit():
+            return False
+        if not guild.roles:
+            print(f"Skipping role reconciliation for {user_id}: no role cache for guild {guild.id} in this process")
+            return False
+        member = await member_lookup.member(guild, user_id)
+        if not member:
+            return False
+        return await self.check_and_assign_roles(member)
+    
     def _get_role(self, guild, role_name):
         return discord.utils.get(guild.roles, name=role_name)
     
@@ -209,13 +1450,157 @@ class AutoRoleManager:
             member_display_name in field_lower
         ])
 
+async def resolve_channel(client, channel_id):
+    """Channel from the gateway cache, or over REST when the cache does not have it (worker mode, archived threads)."""
+    channel = client.get_channel(int(channel_id))
+    if channel is None:
+        try:
+            channel = await client.fetch_channel(int(channel_id))
+        except discord.NotFound:
+            return None
+    return channel
+
+def is_ticket_thread(channel):
+    return getattr(channel, "type", None) == discord.ChannelType.private_thread
+
+class TicketPlacement:
+    """Spreads ticket channels over the ticket category and managed overflow categories named "<base> N".
+    
+    `create_text_channel` adds the channel to the guild cache before it returns, so `category.channels`
+    is current; only channels still being created are counted in memory.
+    """
+    
+    def __init__(self, limit=TICKET_CATEGORY_LIMIT, max_overflow=TICKET_OVERFLOW_CATEGORIES):
+        self.limit = limit
+        self.max_overflow = max_overflow
+        self.in_flight = {}
+        self.locks = {}
+    
+    def used(self, category):
+        return len(category.channels) + self.in_flight.get(category.id, 0)
+    
+    def overflow(self, guild, base):
+        """Existing overflow categories by their index N."""
+        pattern = re.compile(rf"{re.escape(base.name)} (\d+)")
+        overflow = {}
+        for category in guild.categories:
+            match = pattern.fullmatch(category.name)
+            if match and category.id != base.id and int(match.group(1)) >= 2:
+                overflow[int(match.group(1))] = category
+        return overflow
+    
+    async def _reserve(self, guild, base):
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            overflow = self.overflow(guild, base)
+            categories = [base] + [overflow[index] for index in sorted(overflow)]
+            category = next((category for category in categories if self.used(category) < self.limit), None)
+            if category is None:
+                if len(overflow) >= self.max_overflow:
+                    raise Exception(f"All {len(categories)} ticket categories are full")
+                index = next(index for index in itertools.count(2) if index not in overflow)
+                category = await guild.create_category(
+                    f"{base.name} {index}",
+                    overwrites=base.overwrites,
+                    position=base.position + index - 1,
+                    reason="Ticket category overflow"
+                )
+                metrics.inc("obrc_ticket_overflow_categories_created_total")
+                print(f"📂 Created overflow ticket category {category.name}")
+            self.in_flight[category.id] = self.in_flight.get(category.id, 0) + 1
+            metrics.set_gauge("obrc_ticket_category_channels", self.used(category), {"category": category.name})
+            return category
+    
+    @contextlib.asynccontextmanager
+    async def slot(self, guild, base):
+        category = await self._reserve(guild, base)
+        try:
+            yield category
+        finally:
+            self.in_flight[category.id] -= 1
+
+class VoterDigest:
+    """Collects new-vote notices for voters who chose digest delivery and sends one summary DM per window."""
+    
+    def __init__(self, window=VOTER_DIGEST_WINDOW):
+        self.window = window
+        self.preferences = {}
+        self.pending = {}
+    
+    async def load(self):
+        try:
+            result = await supabase.table(VOTER_PREFERENCES_TABLE).select("*").execute()
+        except Exception as e:
+            print(f"⚠️ Could not load voter preferences, using {VOTER_DELIVERY_DEFAULT} delivery: {e}")
+            return
+        self.preferences = {int(row["user_id"]): row["delivery"] for row in result.data or []}
+    
+    def delivery(self, member_id):
+        return self.preferences.get(member_id, VOTER_DELIVERY_DEFAULT)
+    
+    async def set_delivery(self, member_id, delivery):
+        await supabase.table(VOTER_PREFERENCES_TABLE).upsert(
+            {"user_id": str(member_id), "delivery": delivery},
+            on_conflict="user_id"
+        ).execute()
+        self.preferences[member_id] = delivery
+    
+    def add(self, member, ticket_channel):
+        entry = self.pending.setdefault((member.guild.id, member.id), (member, []))
+        entry[1].append(ticket_channel.id)
+        metrics.inc("obrc_voter_notifications_total", {"result": "digested"})
+    
+    async def _open_votes(self, client):
+        rows = (await supabase.table("voting_tickets").select("ticket_channel_id", "ticket_type", "target_name", "expires_at").eq("status", "active").execute()).data or []
+        open_votes = {}
+        for row in rows:
+            channel = client.get_channel(int(row['ticket_channel_id']))
+            if not channel:
+                continue
+            expires_at = datetime.fromisoformat(str(row['expires_at']).replace("Z", "+00:00"))
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            open_votes.setdefault(channel.guild.id, []).append(
+                f"• **{row['ticket_type'].replace('_', ' ').title()}** {row['target_name']}: "
+                f"{channel.jump_url} (closes <t:{int(expires_at.timestamp())}:R>)"
+            )
+        return open_votes
+    
+    async def flush(self, client):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        open_votes = await self._open_votes(client)
+        
+        for (guild_id, _), (member, new_tickets) in pending.items():
+            lines = open_votes.get(guild_id)
+            if not lines:
+                continue
+            embed = discord.Embed(
+                title=f"🗳️ {len(lines)} Open Vote(s)",
+                colour=discord.Colour.blue(),
+                description="\n".join(lines)[:4000],
+                timestamp=datetime.utcnow()
+            )
+            embed.set_footer(text=f"{len(new_tickets)} new since your last digest • /notifications to change delivery")
+            try:
+                await outbound.submit(PRIORITY_DMS, "dm", lambda: member.send(embed=embed))
+                metrics.inc("obrc_voter_notifications_total", {"result": "digest_sent"})
+            except Exception as e:
+                print(f"Failed to send vote digest to {member}: {e}")
+                metrics.inc("obrc_voter_notifications_total", {"result": "failed"})
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            await self.flush(bot)
+
 class VotingTicketManager:
     def __init__(self):
         pass
     
     async def notify_voters(self, guild, ticket_type, target_name, ticket_channel):
         try:
-            voter_role = discord.utils.get(guild.roles, id=VOTER_ROLE_ID)
+            voter_role = guild_configs.get(guild).voter_role(guild)
             if not voter_role:
                 print("Voter role not found for notifications")
                 return
@@ -244,48 +1629,82 @@ class VotingTicketManager:
             
             successful_notifications = 0
             failed_notifications = 0
+            digested_notifications = 0
             
-            for member in voter_role.members:
+            for member in await member_lookup.role_members(voter_role):
+                if voter_digest.delivery(member.id) == "digest":
+                    voter_digest.add(member, ticket_channel)
+                    digested_notifications += 1
+                    continue
                 try:
-                    await member.send(embed=embed)
+                    await outbound.submit(PRIORITY_DMS, "dm", lambda: member.send(embed=embed))
                     successful_notifications += 1
+                    metrics.inc("obrc_voter_notifications_total", {"result": "sent"})
 
                     await asyncio.sleep(0.5)
                 except Exception as e:
                     print(f"Failed to DM {member}: {e}")
                     failed_notifications += 1
+                    metrics.inc("obrc_voter_notifications_total", {"result": "failed"})
             
-            print(f"Voter notifications: {successful_notifications} successful, {failed_notifications} failed")
+            print(f"Voter notifications: {successful_notifications} successful, {failed_notifications} failed, {digested_notifications} queued for digest")
             
         except Exception as e:
             print(f"Error sending voter notifications: {e}")
     
+    async def _open_ticket(self, guild, ticket_name, voter_role):
+        config = guild_configs.get(guild)
+        if config.ticket_backend == "thread":
+            parent = config.ticket_thread_channel(guild)
+            if not parent:
+                raise Exception("Ticket thread channel not found")
+            
+            return await parent.create_thread(
+                name=ticket_name[:100],
+                type=discord.ChannelType.private_thread,
+                invitable=False,
+                auto_archive_duration=TICKET_THREAD_ARCHIVE_MINUTES
+            )
+        
+        category = config.ticket_category(guild)
+        if not category:
+            raise Exception("Ticket category not found")
+        
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            voter_role: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        }
+        
+        async with ticket_placement.slot(guild, category) as ticket_category:
+            ticket_channel = await ticket_category.create_text_channel(
+                name=ticket_name,
+                overwrites=overwrites
+            )
+        return ticket_channel
+    
+    async def _close_ticket(self, channel):
+        if is_ticket_thread(channel):
+            await channel.edit(archived=True, locked=True)
+            print(f"Archived ticket thread {channel.name}")
+            return
+        
+        await asyncio.sleep(30)
+        await channel.delete()
+        print(f"Successfully deleted ticket channel {channel.name}")
+    
     async def create_voting_ticket(self, guild, ticket_type, target_name, target_discord_id, target_nation_id, proposal_data, created_by):
         try:
             message = None
-            category = discord.utils.get(guild.categories, id=TICKET_CATEGORY_ID)
-            if not category:
-                raise Exception("Ticket category not found")
-            
-
-            voter_role = discord.utils.get(guild.roles, id=VOTER_ROLE_ID)
+            voter_role = guild_configs.get(guild).voter_role(guild)
             if not voter_role:
                 raise Exception("Voter role not found")
             
 
             ticket_name = f"{ticket_type}-{target_name.lower().replace(' ', '-')}"
             
-
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                voter_role: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-                guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-            }
-            
-            ticket_channel = await category.create_text_channel(
-                name=ticket_name,
-                overwrites=overwrites
-            )
+            # In thread mode the role mention in the first message adds every voter to the thread at once.
+            ticket_channel = await self._open_ticket(guild, ticket_name, voter_role)
             
 
             action_text = "Add to" if ticket_type == "add" else "Remove from"
@@ -386,7 +1805,8 @@ class VotingTicketManager:
             
 
             poll_message = await ticket_channel.send(poll=poll)
-            await poll_message.pin()
+            if not is_ticket_thread(ticket_channel):
+                await poll_message.pin()
             
 
             expires_at = datetime.utcnow() + timedelta(hours=POLL_DURATION_HOURS)
@@ -404,10 +1824,9 @@ class VotingTicketManager:
             }
             
             try:
-                result = supabase.table("voting_tickets").insert(ticket_data).execute()
-                print(f"Inserted ticket: {result}")
+                await outbox.upsert("voting_tickets", ticket_data, on_conflict="poll_message_id")
             except Exception as e:
-                print(f"Error inserting ticket: {e}")
+                print(f"Error queueing ticket insert: {e}")
             
 
             await self.notify_voters(guild, ticket_type, target_name, ticket_channel)
@@ -423,40 +1842,71 @@ class VotingTicketManager:
             traceback.print_exc()
             return None, None
     
+    async def _claim_expired(self, table, now):
+        """Lease expired rows to this worker; rows whose lease ran out are taken over from the dead holder.
+        
+        Each claim is a single conditional UPDATE ... RETURNING, so when several replicas race for the
+        same row the database hands it to exactly one of them.
+        """
+        current_time = now.isoformat()
+        lease = {
+            "status": "processing",
+            "lease_owner": WORKER_ID,
+            "lease_expires_at": (now + timedelta(seconds=TICKET_LEASE_SECONDS)).isoformat()
+        }
+        
+        claimed = (await supabase.table(table).update(lease).eq("status", "active").lt("expires_at", current_time).execute()).data or []
+        taken_over = (await supabase.table(table).update(lease).eq("status", "processing").lt("lease_expires_at", current_time).execute()).data or []
+        
+        if claimed:
+            metrics.inc("obrc_ticket_leases_total", {"table": table, "kind": "claimed"}, len(claimed))
+        if taken_over:
+            metrics.inc("obrc_ticket_leases_total", {"table": table, "kind": "takeover"}, len(taken_over))
+            print(f"♻️ Took over {len(taken_over)} expired lease(s) on {table}")
+        return claimed + taken_over
+    
+    async def _renew_lease(self, table, row):
+        """Restart the lease clock right before working on a row; False if another worker has taken it over."""
+        lease_expires_at = (datetime.utcnow() + timedelta(seconds=TICKET_LEASE_SECONDS)).isoformat()
+        result = await supabase.table(table).update({"lease_expires_at": lease_expires_at}).eq("id", row['id']).eq("lease_owner", WORKER_ID).eq("status", "processing").execute()
+        return bool(result.data)
+    
+    @instrumented("task", "check_expired_polls")
     async def check_expired_polls(self, bot):
         try:
 
-            current_time = datetime.utcnow().isoformat()
-            result = supabase.table("voting_tickets").select("*").eq("status", "active").lt("expires_at", current_time).execute()
-            
-            expired_tickets = result.data if result.data else []
+            now = datetime.utcnow()
+            expired_tickets = await self._claim_expired("voting_tickets", now)
             
             for ticket_row in expired_tickets:
+                if not await self._renew_lease("voting_tickets", ticket_row):
+                    continue
 
-                channel = bot.get_channel(int(ticket_row['ticket_channel_id']))
+                channel = await resolve_channel(bot, ticket_row['ticket_channel_id'])
                 if channel:
-                    await self._process_expired_ticket(bot, ticket_row)
+                    await self._process_expired_ticket(bot, ticket_row, channel)
                 else:
 
                     print(f"Ticket channel {ticket_row['ticket_channel_id']} no longer exists, marking as completed")
-                    supabase.table("voting_tickets").update({
+                    await supabase.table("voting_tickets").update({
                         "status": "completed",
                         "final_result": "channel_deleted"
                     }).eq("id", ticket_row['id']).execute()
             
 
-            evidence_result = supabase.table("evidence_votes").select("*").eq("status", "active").lt("expires_at", current_time).execute()
-            expired_evidence = evidence_result.data if evidence_result.data else []
+            expired_evidence = await self._claim_expired("evidence_votes", datetime.utcnow())
             
             for evidence_row in expired_evidence:
+                if not await self._renew_lease("evidence_votes", evidence_row):
+                    continue
 
-                channel = bot.get_channel(int(evidence_row['ticket_channel_id']))
+                channel = await resolve_channel(bot, evidence_row['ticket_channel_id'])
                 if channel:
-                    await self._process_expired_evidence(bot, evidence_row)
+                    await self._process_expired_evidence(bot, evidence_row, channel)
                 else:
 
                     print(f"Evidence vote channel {evidence_row['ticket_channel_id']} no longer exists, marking as completed")
-                    supabase.table("evidence_votes").update({
+                    await supabase.table("evidence_votes").update({
                         "status": "completed",
                         "final_result": "channel_deleted"
                     }).eq("id", evidence_row['id']).execute()
@@ -466,12 +1916,12 @@ class VotingTicketManager:
             import traceback
             traceback.print_exc()
     
-    async def _process_expired_ticket(self, bot, ticket_row):
+    async def _process_expired_ticket(self, bot, ticket_row, channel=None):
         try:
-            channel = bot.get_channel(int(ticket_row['ticket_channel_id']))
+            channel = channel or await resolve_channel(bot, ticket_row['ticket_channel_id'])
             if not channel:
                 print(f"Ticket channel {ticket_row['ticket_channel_id']} not found")
-                supabase.table("voting_tickets").update({
+                await supabase.table("voting_tickets").update({
                     "status": "completed",
                     "final_result": "channel_not_found"
                 }).eq("id", ticket_row['id']).execute()
@@ -592,24 +2042,28 @@ class VotingTicketManager:
                     inline=False
                 )
             
-            await channel.send(embed=result_embed)
+            await outbound.submit(PRIORITY_RESULTS, f"messages:{channel.id}", lambda: channel.send(embed=result_embed))
+            
+            if action_taken or not passed:
+                await export_job_manager.schedule_vote_outcome_syncs(ticket_row['ticket_type'], passed)
+            
+            if action_taken and ticket_row['ticket_type'] in ["add", "remove"]:
+                await auto_role_manager.reconcile_member(channel.guild, ticket_row['target_discord_id'])
             
 
             await self._create_transcript(bot, channel, ticket_row['ticket_type'], ticket_row['target_name'], result_text, yes_votes, no_votes)
             
 
-            supabase.table("voting_tickets").update({
+            await supabase.table("voting_tickets").update({
                 "status": "completed",
                 "final_result": f"{result_text}:{yes_votes}:{no_votes}"
             }).eq("id", ticket_row['id']).execute()
             
 
-            await asyncio.sleep(30)
             try:
-                await channel.delete()
-                print(f"Successfully deleted ticket channel {channel.name}")
+                await self._close_ticket(channel)
             except Exception as e:
-                print(f"Error deleting ticket channel: {e}")
+                print(f"Error closing ticket channel: {e}")
             
         except Exception as e:
             print(f"Error processing expired ticket: {e}")
@@ -632,7 +2086,8 @@ class VotingTicketManager:
                     "added_by": f"Vote initiated by {created_by}"
                 }
                 
-                supabase.table("greylist").insert(greylist_data).execute()
+                await supabase.table("greylist").insert(greylist_data).execute()
+                blacklist_manager.record_change("greylist")
                 print(f"Added {ticket_row['target_name']} to greylist")
                 
             elif ticket_row['ticket_type'] == "add_company":
@@ -646,7 +2101,8 @@ class VotingTicketManager:
                     "added_by": f"Vote initiated by {created_by}"
                 }
                 
-                supabase.table("greylist_coo").insert(greylist_data).execute()
+                await supabase.table("greylist_coo").insert(greylist_data).execute()
+                blacklist_manager.record_change("greylist_coo")
                 print(f"Added company {ticket_row['target_name']} to greylist")
                 
         except Exception as e:
@@ -654,12 +2110,12 @@ class VotingTicketManager:
             import traceback
             traceback.print_exc()
     
-    async def _process_expired_evidence(self, bot, evidence_row):
+    async def _process_expired_evidence(self, bot, evidence_row, channel=None):
         try:
-            channel = bot.get_channel(int(evidence_row['ticket_channel_id']))
+            channel = channel or await resolve_channel(bot, evidence_row['ticket_channel_id'])
             if not channel:
                 print(f"Evidence vote channel {evidence_row['ticket_channel_id']} not found")
-                supabase.table("evidence_votes").update({
+                await supabase.table("evidence_votes").update({
                     "status": "completed",
                     "final_result": "channel_not_found"
                 }).eq("id", evidence_row['id']).execute()
@@ -709,17 +2165,17 @@ class VotingTicketManager:
                     inline=False
                 )
                 
-                await channel.send(embed=result_embed)
+                await outbound.submit(PRIORITY_RESULTS, f"messages:{channel.id}", lambda: channel.send(embed=result_embed))
                 
 
-                supabase.table("evidence_votes").update({
+                await supabase.table("evidence_votes").update({
                     "status": "completed",
                     "final_result": final_result
                 }).eq("id", evidence_row['id']).execute()
                 
             except discord.NotFound:
                 print(f"Evidence vote message {evidence_row['message_id']} not found")
-                supabase.table("evidence_votes").update({
+                await supabase.table("evidence_votes").update({
                     "status": "completed",
                     "final_result": "message_not_found"
                 }).eq("id", evidence_row['id']).execute()
@@ -835,7 +2291,8 @@ class VotingTicketManager:
     
     async def _create_transcript(self, bot, channel, ticket_type, target_name, result, yes_votes, no_votes):
         try:
-            transcript_channel = bot.get_channel(TRANSCRIPT_CHANNEL_ID)
+            config = guild_configs.get(channel.guild)
+            transcript_channel = config.transcript_channel(channel.guild) or await resolve_channel(bot, config.transcript_channel_id)
             if not transcript_channel:
                 print("Transcript channel not found")
                 return
@@ -888,22 +2345,419 @@ MESSAGES
                 timestamp=datetime.utcnow()
             )
             
-            await transcript_channel.send(embed=transcript_embed, file=transcript_file)
+            async def send_transcript():
+                transcript_file.reset()
+                return await transcript_channel.send(embed=transcript_embed, file=transcript_file)
+            
+            await outbound.submit(PRIORITY_BULK, f"messages:{transcript_channel.id}", send_transcript)
             
         except Exception as e:
             print(f"Error creating transcript: {e}")
 
+LIST_TABLES = ("blacklist", "greylist", "blacklist_coo", "greylist_coo")
+PEOPLE_TABLES = ("blacklist", "greylist")
+COMPANY_TABLES = ("blacklist_coo", "greylist_coo")
+OPEN_TICKET_STATUSES = ("active", "processing")
+LIST_STORE_PAGE_SIZE = 1000
+CHANGE_FEED = os.getenv("CHANGE_FEED", "realtime")
+CHANGE_FEED_SUBSCRIBE_TIMEOUT = 30
+CHANGE_FEED_HEALTH_INTERVAL = 5
+ALT_NETWORK_MAX_ACCOUNTS = int(os.getenv("ALT_NETWORK_MAX_ACCOUNTS", "500"))
+
+def parse_alt_ids(text):
+    if not text:
+        return []
+    alt_ids = re.findall(r'<@(\d+)>', text)
+    alt_ids.extend(re.findall(r'\b(\d{17,19})\b', text))
+    return alt_ids
+
+class SnowflakeSet:
+    """Immutable membership set of Discord IDs held as a sorted array('Q'): eight bytes per ID."""
+    
+    def __init__(self, ids=()):
+        self.sorted = array("Q", sorted(set(ids)))
+    
+    def __contains__(self, snowflake):
+        index = bisect.bisect_left(self.sorted, snowflake)
+        return index < len(self.sorted) and self.sorted[index] == snowflake
+    
+    def __len__(self):
+        return len(self.sorted)
+    
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.sorted)
+
+def person_snowflakes(row):
+    """Every Discord ID a people-list row answers to: its primary ID and parsed alts."""
+    linked = parse_alt_ids(row.get("possible_alts"))
+    if row.get("discord_id"):
+        linked.append(str(row["discord_id"]))
+    return [int(snowflake) for snowflake in linked if snowflake.isdigit() and int(snowflake) < 1 << 64]
+
+INTERNED_FIELDS = frozenset(("added_by", "modified_by"))
+
+class ListRecord:
+    """Resident copy of one list row, read like the PostgREST dict it came from (`get`, `[]`, `in`).
+    
+    Known columns live in slots and repeated strings are interned; columns the class does not know
+    about are kept in `extra`. Records are shared by every reader and must not be mutated.
+    """
+    
+    __slots__ = ("extra",)
+    FIELDS = ()
+    FIELD_SET = frozenset()
+    
+    def __init__(self, row, list_type):
+        extra = None
+        for field in self.FIELDS:
+            setattr(self, field, None)
+        for key, value in row.items():
+            if key in self.FIELD_SET:
+                if key in INTERNED_FIELDS and isinstance(value, str):
+                    value = sys.intern(value)
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.list_type = sys.intern(list_type)
+        self.extra = extra
+    
+    def get(self, key, default=None):
+        if key in self.FIELD_SET:
+            return getattr(self, key)
+        return self.extra.get(key, default) if self.extra else default
+    
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return key in self.FIELD_SET or bool(self.extra and key in self.extra)
+    
+    def to_dict(self):
+        return {**{field: getattr(self, field) for field in self.FIELDS}, **(self.extra or {})}
+
+class PersonRecord(ListRecord):
+    FIELDS = (
+        "id", "discord_id", "discord_name", "nation_id", "nation_url", "possible_alts", "reason",
+        "proof_urls", "added_by", "date_added", "last_modified", "modified_by", "list_type",
+    )
+    FIELD_SET = frozenset(FIELDS)
+    __slots__ = FIELDS
+
+class CompanyRecord(ListRecord):
+    FIELDS = (
+        "id", "company_name", "owner", "personnel", "alts", "reason",
+        "proof_urls", "added_by", "date_added", "last_modified", "modified_by", "list_type",
+    )
+    FIELD_SET = frozenset(FIELDS)
+    __slots__ = FIELDS
+
+RECORD_TYPES = {
+    "blacklist": (PersonRecord, "blacklist"),
+    "greylist": (PersonRecord, "greylist"),
+    "blacklist_coo": (CompanyRecord, "blacklist"),
+    "greylist_coo": (CompanyRecord, "greylist"),
+}
+
+class ListStore:
+    """In-memory copy of the list tables and open voting tickets, kept current by the change feed.
+    
+    Until the first sync finishes (or after the feed drops) `ready` is False and callers query Supabase instead.
+    """
+    
+    def __init__(self):
+        self.tables = {table: {} for table in LIST_TABLES + ("voting_tickets",)}
+        self.by_discord_id = {table: {} for table in PEOPLE_TABLES}
+        self.by_nation_id = {table: {} for table in PEOPLE_TABLES}
+        self.by_alt_id = {table: {} for table in PEOPLE_TABLES}
+        self.tickets_by_poll = {}
+        self.ready = False
+        self.pending = None
+    
+    def _keys(self, table, row):
+        keys = []
+        if row.get("discord_id"):
+            keys.append((self.by_discord_id[table], str(row["discord_id"])))
+        if row.get("nation_id"):
+            keys.append((self.by_nation_id[table], str(row["nation_id"])))
+        keys.extend((self.by_alt_id[table], alt_id) for alt_id in parse_alt_ids(row.get("possible_alts")))
+        return keys
+    
+    def _index(self, table, row):
+        if table == "voting_tickets":
+            self.tickets_by_poll[str(row.get("poll_message_id"))] = row["id"]
+            return
+        if table in PEOPLE_TABLES:
+            for index, key in self._keys(table, row):
+                index.setdefault(key, set()).add(row["id"])
+    
+    def _unindex(self, table, row):
+        if table == "voting_tickets":
+            key = str(row.get("poll_message_id"))
+            if self.tickets_by_poll.get(key) == row["id"]:
+                del self.tickets_by_poll[key]
+        elif table in PEOPLE_TABLES:
+            for index, key in self._keys(table, row):
+                row_ids = index.get(key)
+                if row_ids is not None:
+                    row_ids.discard(row["id"])
+                    if not row_ids:
+                        del index[key]
+    
+    def _put(self, table, row):
+        self._delete(table, row["id"])
+        if table == "voting_tickets" and row.get("status") not in OPEN_TICKET_STATUSES:
+            return
+        if table in RECORD_TYPES:
+            record_type, list_type = RECORD_TYPES[table]
+            row = record_type(row, list_type)
+        self.tables[table][row["id"]] = row
+        self._index(table, row)
+    
+    def _delete(self, table, row_id):
+        old = self.tables[table].pop(row_id, None)
+        if old is not None:
+            self._unindex(table, old)
+    
+    def apply(self, event_type, table, record=None, old_record=None):
+        """Apply one row-level INSERT, UPDATE or DELETE event."""
+        if table not in self.tables:
+            return
+        if self.pending is not None:
+            self.pending.append((event_type, table, record, old_record))
+            return
+        
+        if event_type == "DELETE":
+            if (old_record or {}).get("id") is not None:
+                self._delete(table, old_record["id"])
+        elif record and record.get("id") is not None:
+            self._put(table, record if table in RECORD_TYPES else dict(record))
+        
+        metrics.inc("obrc_change_events_total", {"table": table, "type": event_type.lower()})
+        metrics.set_gauge("obrc_list_store_rows", len(self.tables[table]), {"table": table})
+        if table in LIST_TABLES:
+            blacklist_manager.record_change(table)
+    
+    async def _fetch(self, table, columns="*"):
+        rows, start = [], 0
+        while True:
+            query = supabase.table(table).select(columns)
+            if table == "voting_tickets":
+                query = query.in_("status", list(OPEN_TICKET_STATUSES))
+            page = (await query.order("id").range(start, start + LIST_STORE_PAGE_SIZE - 1).execute()).data or []
+            rows.extend(page)
+            if len(page) < LIST_STORE_PAGE_SIZE:
+                return rows
+            start += LIST_STORE_PAGE_SIZE
+    
+    async def sync(self):
+        """Reload every table; events that arrive during the load are replayed on top of the snapshot."""
+        self.ready = False
+        self.pending = []
+        started = time.perf_counter()
+        try:
+            snapshot = {table: await self._fetch(table) for table in self.tables}
+        except Exception:
+            self.pending = None
+            raise
+        
+        pending, self.pending = self.pending, None
+        self.__init__()
+        for table, rows in snapshot.items():
+            for row in rows:
+                self._put(table, row)
+        for event in pending:
+            self.apply(*event)
+        self.ready = True
+        
+        for table, rows in self.tables.items():
+            metrics.set_gauge("obrc_list_store_rows", len(rows), {"table": table})
+        counts = ", ".join(f"{table} {len(rows)}" for table, rows in self.tables.items())
+        print(f"🗂️ List store synced in {time.perf_counter() - started:.2f}s ({counts}; {len(pending)} events replayed)")
+    
+    def _first(self, table, row_ids):
+        return self.tables[table][min(row_ids)]
+    
+    def find_person(self, discord_id):
+        key = str(discord_id)
+        for table in PEOPLE_TABLES:
+            for index in (self.by_discord_id[table], self.by_alt_id[table]):
+                if index.get(key):
+                    return self._first(table, index[key])
+        return None
+    
+    def find_by_nation(self, nation_id):
+        for table in PEOPLE_TABLES:
+            row_ids = self.by_nation_id[table].get(str(nation_id))
+            if row_ids:
+                return self._first(table, row_ids)
+        return None
+    
+    def find_company(self, company_name):
+        needle = company_name.lower()
+        for table in COMPANY_TABLES:
+            for row in self.tables[table].values():
+                if needle in (row.company_name or "").lower():
+                    return row
+        return None
+    
+    def alt_network(self, discord_id):
+        """Every account and people-list entry connected to discord_id through primary IDs and possible_alts.
+        
+        Walks the discord_id and alt indexes breadth-first: an account leads to every entry naming it,
+        and an entry leads to its primary ID and all of its alts. Returns (account IDs, entries, truncated).
+        """
+        accounts = {str(discord_id)}
+        entries = {}
+        frontier = deque(accounts)
+        while frontier:
+            account = frontier.popleft()
+            for table in PEOPLE_TABLES:
+                for index in (self.by_discord_id[table], self.by_alt_id[table]):
+                    for row_id in index.get(account, ()):
+                        if (table, row_id) in entries:
+                            continue
+                        row = self.tables[table][row_id]
+                        entries[(table, row_id)] = row
+                        linked = parse_alt_ids(row.get("possible_alts"))
+                        if str(row.get("discord_id") or "").isdigit():
+                            linked.append(str(row.get("discord_id")))
+                        for linked_id in linked:
+                            if linked_id not in accounts:
+                                if len(accounts) >= ALT_NETWORK_MAX_ACCOUNTS:
+                                    return sorted(accounts, key=int), list(entries.values()), True
+                                accounts.add(linked_id)
+                                frontier.append(linked_id)
+        if not entries:
+            return [], [], False
+        return sorted(accounts, key=int), list(entries.values()), False
+    
+    def all_records(self, table):
+        return sorted(self.tables[table].values(), key=lambda row: row.date_added or "", reverse=True)
+    
+    def ticket_by_poll(self, poll_message_id):
+        row_id = self.tickets_by_poll.get(str(poll_message_id))
+        return dict(self.tables["voting_tickets"][row_id]) if row_id is not None else None
+
+class KnownIdSnapshot:
+    """Compact set of every Discord ID on the people lists, answering "not listed" while the list store is not ready.
+    
+    Without the store a lookup for someone on no list used to end in a full-table alt scan of both lists.
+    The snapshot is tagged with the dataset versions it was built from and only trusted while Supabase
+    reports the same versions, so a write anywhere costs a rebuild rather than a wrong all clear.
+    """
+    
+    def __init__(self):
+        self.ids = SnowflakeSet()
+        self.versions = None
+        self.lock = asyncio.Lock()
+    
+    async def _rebuild(self, versions):
+        started = time.perf_counter()
+        fetcher = ListStore()
+        ids = []
+        for table in PEOPLE_TABLES:
+            for row in await fetcher._fetch(table, "discord_id,possible_alts"):
+                ids.extend(person_snowflakes(row))
+        self.ids = await asyncio.to_thread(SnowflakeSet, ids)
+        self.versions = versions
+        metrics.set_gauge("obrc_known_ids", len(self.ids))
+        metrics.set_gauge("obrc_known_ids_bytes", self.ids.nbytes)
+        print(f"🪪 Known-ID snapshot rebuilt in {time.perf_counter() - started:.2f}s ({len(self.ids)} IDs, {self.ids.nbytes} bytes)")
+    
+    async def may_contain(self, discord_id):
+        """False only when discord_id is certainly on no people list; the version check costs two indexed reads per list."""
+        key = str(discord_id)
+        if not key.isdigit() or int(key) >= 1 << 64:
+            return True
+        versions = await asyncio.gather(*(blacklist_manager.dataset_version(table) for table in PEOPLE_TABLES))
+        async with self.lock:
+            if versions != self.versions:
+                await self._rebuild(versions)
+        found = int(key) in self.ids
+        metrics.inc("obrc_known_id_checks_total", {"result": "candidate" if found else "absent"})
+        return found
+
+class ChangeFeed:
+    """Supabase Realtime subscription feeding row changes into the list store.
+    
+    The store is resynced after every (re)subscribe, so events missed while disconnected are never lost.
+    Disconnects raise, leaving reconnect backoff to the task supervisor.
+    """
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def _on_change(self, payload):
+        data = payload["data"]
+        self.store.apply(str(data["type"].value if hasattr(data["type"], "value") else data["type"]), data["table"], data.get("record"), data.get("old_record"))
+    
+    async def run(self):
+        from realtime import AsyncRealtimeClient, RealtimePostgresChangesListenEvent
+        
+        subscribed = asyncio.Event()
+        lost = asyncio.Event()
+        
+        def on_state(state, error):
+            if state == "SUBSCRIBED":
+                subscribed.set()
+            else:
+                print(f"⚠️ Change feed subscription {state}: {error}")
+                lost.set()
+        
+        client = AsyncRealtimeClient(f"{SUPABASE_URL}/realtime/v1", SUPABASE_KEY, auto_reconnect=False)
+        try:
+            await client.connect()
+            channel = client.channel("obrc-list-changes")
+            for table in self.store.tables:
+                channel.on_postgres_changes(RealtimePostgresChangesListenEvent.All, callback=self._on_change, table=table, schema="public")
+            await channel.subscribe(on_state)
+            await asyncio.wait_for(subscribed.wait(), timeout=CHANGE_FEED_SUBSCRIBE_TIMEOUT)
+            await self.store.sync()
+            
+            while client.is_connected and channel.is_joined and not lost.is_set():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(lost.wait(), timeout=CHANGE_FEED_HEALTH_INTERVAL)
+            raise ConnectionError("Realtime change feed disconnected")
+        finally:
+            self.store.ready = False
+            with contextlib.suppress(Exception):
+                await client.close()
+
 class BlacklistManager:
+    change_counters = {}
+    
     def __init__(self):
         pass
     
+    def record_change(self, table_name):
+        self.change_counters[table_name] = self.change_counters.get(table_name, 0) + 1
+    
+    async def dataset_version(self, list_type):
+        count_result = await supabase.table(list_type).select("id", count="exact").order("id", desc=True).limit(1).execute()
+        modified_result = await supabase.table(list_type).select("last_modified").order("last_modified", desc=True, nullsfirst=False).limit(1).execute()
+        
+        max_id = count_result.data[0]['id'] if count_result.data else 0
+        last_modified = modified_result.data[0].get('last_modified') if modified_result.data else None
+        return f"{count_result.count}:{max_id}:{last_modified}:{self.change_counters.get(list_type, 0)}"
+    
     async def search_person(self, discord_id):
+        if list_store.ready:
+            return list_store.find_person(discord_id)
         try:
+            if not await known_ids.may_contain(discord_id):
+                return None
             search_id = str(discord_id)
             print(f"DEBUG: Searching for Discord ID: {search_id}")
             
 
-            result = supabase.table("blacklist").select("*").eq("discord_id", search_id).execute()
+            result = await supabase.table("blacklist").select("*").eq("discord_id", search_id).execute()
             
             if result.data:
                 record = result.data[0]
@@ -911,7 +2765,7 @@ class BlacklistManager:
                 return record
             
 
-            all_records = supabase.table("blacklist").select("*").execute()
+            all_records = await supabase.table("blacklist").select("*").execute()
             
             import re
             for record in all_records.data:
@@ -925,7 +2779,7 @@ class BlacklistManager:
                         return record
             
 
-            result = supabase.table("greylist").select("*").eq("discord_id", search_id).execute()
+            result = await supabase.table("greylist").select("*").eq("discord_id", search_id).execute()
             
             if result.data:
                 record = result.data[0]
@@ -933,7 +2787,7 @@ class BlacklistManager:
                 return record
             
 
-            all_grey_records = supabase.table("greylist").select("*").execute()
+            all_grey_records = await supabase.table("greylist").select("*").execute()
             
             for record in all_grey_records.data:
                 possible_alts = record.get('possible_alts', '')
@@ -962,15 +2816,17 @@ class BlacklistManager:
                 if match:
                     nation_id = match.group(1)
             
+            if list_store.ready:
+                return list_store.find_by_nation(nation_id)
 
-            result = supabase.table("blacklist").select("*").eq("nation_id", nation_id).execute()
+            result = await supabase.table("blacklist").select("*").eq("nation_id", nation_id).execute()
             if result.data:
                 record = result.data[0]
                 record['list_type'] = 'blacklist'
                 return record
             
 
-            result = supabase.table("greylist").select("*").eq("nation_id", nation_id).execute()
+            result = await supabase.table("greylist").select("*").eq("nation_id", nation_id).execute()
             if result.data:
                 record = result.data[0]
                 record['list_type'] = 'greylist'
@@ -983,16 +2839,18 @@ class BlacklistManager:
             return None
     
     async def search_company(self, company_name):
+        if list_store.ready:
+            return list_store.find_company(company_name)
         try:
 
-            result = supabase.table("blacklist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
+            result = await supabase.table("blacklist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
             if result.data:
                 record = result.data[0]
                 record['list_type'] = 'blacklist'
                 return record
             
 
-            result = supabase.table("greylist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
+            result = await supabase.table("greylist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
             if result.data:
                 record = result.data[0]
                 record['list_type'] = 'greylist'
@@ -1006,7 +2864,8 @@ class BlacklistManager:
     
     async def add_person(self, data):
         try:
-            result = supabase.table("blacklist").insert(data).execute()
+            result = await supabase.table("blacklist").insert(data).execute()
+            self.record_change("blacklist")
             return True
         except Exception as e:
             print(f"Error adding person: {e}")
@@ -1014,7 +2873,8 @@ class BlacklistManager:
     
     async def add_company(self, data):
         try:
-            result = supabase.table("blacklist_coo").insert(data).execute()
+            result = await supabase.table("blacklist_coo").insert(data).execute()
+            self.record_change("blacklist_coo")
             return True
         except Exception as e:
             print(f"Error adding company: {e}")
@@ -1025,15 +2885,16 @@ class BlacklistManager:
             search_id = str(discord_id)
             
 
-            result = supabase.table("blacklist").select("*").eq("discord_id", search_id).execute()
+            result = await supabase.table("blacklist").select("*").eq("discord_id", search_id).execute()
             
             if result.data:
                 record = result.data[0]
-                supabase.table("blacklist").delete().eq("discord_id", search_id).execute()
+                await supabase.table("blacklist").delete().eq("discord_id", search_id).execute()
+                self.record_change("blacklist")
                 return record
             
 
-            all_records = supabase.table("blacklist").select("*").execute()
+            all_records = await supabase.table("blacklist").select("*").execute()
             
             import re
             for record in all_records.data:
@@ -1043,7 +2904,8 @@ class BlacklistManager:
                     alt_ids.extend(re.findall(r'\b(\d{17,19})\b', possible_alts))
                     
                     if search_id in alt_ids:
-                        supabase.table("blacklist").delete().eq("id", record['id']).execute()
+                        await supabase.table("blacklist").delete().eq("id", record['id']).execute()
+                        self.record_change("blacklist")
                         return record
             
             return None
@@ -1054,11 +2916,12 @@ class BlacklistManager:
     
     async def remove_company(self, company_name):
         try:
-            result = supabase.table("blacklist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
+            result = await supabase.table("blacklist_coo").select("*").ilike("company_name", f"%{company_name}%").execute()
             
             if result.data:
                 record = result.data[0]
-                supabase.table("blacklist_coo").delete().eq("id", record['id']).execute()
+                await supabase.table("blacklist_coo").delete().eq("id", record['id']).execute()
+                self.record_change("blacklist_coo")
                 return record
             
             return None
@@ -1070,14 +2933,16 @@ class BlacklistManager:
     async def remove_from_greylist(self, discord_id):
         try:
             search_id = str(discord_id)
-            supabase.table("greylist").delete().eq("discord_id", search_id).execute()
+            await supabase.table("greylist").delete().eq("discord_id", search_id).execute()
+            self.record_change("greylist")
             print(f"Removed {search_id} from greylist")
         except Exception as e:
             print(f"Error removing from greylist: {e}")
     
     async def remove_company_from_greylist(self, company_name):
         try:
-            supabase.table("greylist_coo").delete().ilike("company_name", f"%{company_name}%").execute()
+            await supabase.table("greylist_coo").delete().ilike("company_name", f"%{company_name}%").execute()
+            self.record_change("greylist_coo")
             print(f"Removed {company_name} from company greylist")
         except Exception as e:
             print(f"Error removing company from greylist: {e}")
@@ -1163,12 +3028,12 @@ class BlacklistManager:
     async def _edit_in_table(self, table_name, discord_id, field, new_value, modified_by, edit_mode, current_time):
         try:
 
-            result = supabase.table(table_name).select("*").eq("discord_id", discord_id).execute()
+            result = await supabase.table(table_name).select("*").eq("discord_id", discord_id).execute()
             
             
             if not result.data:
 
-                all_records = supabase.table(table_name).select("*").execute()
+                all_records = await supabase.table(table_name).select("*").execute()
                 import re
                 for record in all_records.data:
                     possible_alts = record.get('possible_alts', '')
@@ -1206,10 +3071,11 @@ class BlacklistManager:
                 "modified_by": modified_by
             }
             
-            supabase.table(table_name).update(update_data).eq("id", record['id']).execute()
+            await supabase.table(table_name).update(update_data).eq("id", record['id']).execute()
+            self.record_change(table_name)
             
 
-            updated_result = supabase.table(table_name).select("*").eq("id", record['id']).execute()
+            updated_result = await supabase.table(table_name).select("*").eq("id", record['id']).execute()
             return updated_result.data[0] if updated_result.data else None
             
         except Exception as e:
@@ -1219,7 +3085,7 @@ class BlacklistManager:
     async def _edit_company_in_table(self, table_name, company_name, field, new_value, modified_by, edit_mode, current_time):
         try:
 
-            result = supabase.table(table_name).select("*").ilike("company_name", f"%{company_name}%").execute()
+            result = await supabase.table(table_name).select("*").ilike("company_name", f"%{company_name}%").execute()
             
             if not result.data:
                 return None
@@ -1247,10 +3113,11 @@ class BlacklistManager:
                 "modified_by": modified_by
             }
             
-            supabase.table(table_name).update(update_data).eq("id", record['id']).execute()
+            await supabase.table(table_name).update(update_data).eq("id", record['id']).execute()
+            self.record_change(table_name)
             
 
-            updated_result = supabase.table(table_name).select("*").eq("id", record['id']).execute()
+            updated_result = await supabase.table(table_name).select("*").eq("id", record['id']).execute()
             return updated_result.data[0] if updated_result.data else None
             
         except Exception as e:
@@ -1264,16 +3131,32 @@ class BlacklistManager:
             results.append((discord_id, result))
         return results
     
+    async def alt_network(self, discord_id):
+        """Walk the alt network from the list store, or from a paged Supabase read while it is not ready.
+        
+        Storage errors are raised rather than read as an empty network.
+        """
+        if list_store.ready:
+            return list_store.alt_network(discord_id)
+        
+        index = ListStore()
+        for table in PEOPLE_TABLES:
+            for row in await index._fetch(table):
+                index._put(table, row)
+        return index.alt_network(discord_id)
+    
     async def get_all_records(self, list_type="blacklist"):
+        if list_store.ready and list_type in LIST_TABLES:
+            return list_store.all_records(list_type)
         try:
             if list_type == "blacklist":
-                result = supabase.table("blacklist").select("*").order("date_added", desc=True).execute()
+                result = await supabase.table("blacklist").select("*").order("date_added", desc=True).execute()
             elif list_type == "greylist":
-                result = supabase.table("greylist").select("*").order("date_added", desc=True).execute()
+                result = await supabase.table("greylist").select("*").order("date_added", desc=True).execute()
             elif list_type == "blacklist_coo":
-                result = supabase.table("blacklist_coo").select("*").order("date_added", desc=True).execute()
+                result = await supabase.table("blacklist_coo").select("*").order("date_added", desc=True).execute()
             elif list_type == "greylist_coo":
-                result = supabase.table("greylist_coo").select("*").order("date_added", desc=True).execute()
+                result = await supabase.table("greylist_coo").select("*").order("date_added", desc=True).execute()
             
             return result.data if result.data else []
             
@@ -1281,15 +3164,429 @@ class BlacklistManager:
             print(f"Error getting all records: {e}")
             return []
 
+class ExportCache:
+    def __init__(self, directory=EXPORT_CACHE_DIR, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+    
+    def key(self, list_type, format_type, version):
+        return hashlib.sha256(f"{list_type}|{format_type}|{version}".encode()).hexdigest()
+    
+    def path(self, key, format_type):
+        return os.path.join(self.directory, f"{key}.{obrc_export.FILE_EXTENSIONS[format_type]}")
+    
+    def get(self, key, format_type):
+        path = self.path(key, format_type)
+        if not os.path.exists(path):
+            metrics.inc("obrc_export_cache_requests_total", {"result": "miss"})
+            return None
+        os.utime(path)
+        metrics.inc("obrc_export_cache_requests_total", {"result": "hit"})
+        return path
+    
+    def put(self, key, format_type, source_path):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key, format_type)
+        os.replace(source_path, path)
+        self.evict(keep=path)
+        return path
+    
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        metrics.set_gauge("obrc_export_cache_bytes", total)
+
+class ExportJob:
+    def __init__(self, job_id, interaction, list_type, format_type):
+        self.id = job_id
+        self.interaction = interaction
+        self.user = interaction.user if interaction else None
+        self.list_type = list_type
+        self.format_type = format_type
+        self.status = "queued"
+        self.rows = 0
+        self.message = None
+        self.cache_key = None
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+        self.ended = None
+    
+    @property
+    def finished(self):
+        return self.status in ("completed", "cancelled", "failed")
+
+class ExportJobManager:
+    FORMAT_NAMES = {
+        "excel": "Excel",
+        "csv": "CSV (gzip)",
+        "jsonl": "JSON Lines (gzip)",
+        "parquet": "Parquet",
+        "google_sheets": "Google Sheets",
+        "google_sheets_sync": "Google Sheets (synced)",
+    }
+    LIST_CHANGES = {
+        ("add", True): ("blacklist", "greylist"),
+        ("remove", True): ("blacklist",),
+        ("add_company", True): ("blacklist_coo", "greylist_coo"),
+        ("remove_company", True): ("blacklist_coo",),
+        ("add", False): ("greylist",),
+        ("add_company", False): ("greylist_coo",),
+    }
+    
+    def __init__(self, concurrency=EXPORT_CONCURRENCY, max_pending=EXPORT_MAX_PENDING):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.pool = None
+        self.sync_manager = None
+        self.progress = None
+        self.cancelled = None
+        self.semaphore = None
+        self.sync_locks = {}
+    
+    def pending_jobs(self):
+        return [job for job in self.jobs.values() if not job.finished]
+    
+    def _start_pool(self):
+        context = multiprocessing.get_context("spawn")
+        os.makedirs(EXPORT_OUTPUT_DIR, exist_ok=True)
+        self.sync_manager = context.Manager()
+        self.progress = self.sync_manager.dict()
+        self.cancelled = self.sync_manager.dict()
+        self.pool = ProcessPoolExecutor(max_workers=self.concurrency, mp_context=context)
+    
+    async def submit(self, interaction, list_type, format_type):
+        if len(self.pending_jobs()) >= self.max_pending:
+            raise RuntimeError(f"Too many exports in progress ({self.max_pending}). Please try again shortly.")
+        
+        cache_key = None
+        if format_type in obrc_export.FILE_EXTENSIONS:
+            version = await blacklist_manager.dataset_version(list_type)
+            cache_key = export_cache.key(list_type, format_type, version)
+            cached_path = export_cache.get(cache_key, format_type)
+            if cached_path:
+                await self._send_cached(interaction, list_type, format_type, cached_path)
+                return None
+        
+        await self._ensure_pool()
+        
+        job = ExportJob(next(self.job_ids), interaction, list_type, format_type)
+        job.cache_key = cache_key
+        self.jobs[job.id] = job
+        self._prune()
+        
+        job.message = await interaction.followup.send(embed=self._progress_embed(job), view=ExportJobView(job.id), ephemeral=True, wait=True)
+        asyncio.create_task(self._run(job))
+        self._update_gauges()
+        return job
+    
+    async def _ensure_pool(self):
+        if self.pool is None:
+            await asyncio.to_thread(self._start_pool)
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+    
+    async def schedule_sheet_sync(self, list_type):
+        if not SHEETS_AUTO_SYNC:
+            return None
+        
+        if any(job.status == "queued" and job.list_type == list_type and job.format_type == "google_sheets_sync" for job in self.jobs.values()):
+            return None
+        
+        await self._ensure_pool()
+        job = ExportJob(next(self.job_ids), None, list_type, "google_sheets_sync")
+        self.jobs[job.id] = job
+        self._prune()
+        asyncio.create_task(self._run(job))
+        self._update_gauges()
+        return job
+    
+    async def schedule_vote_outcome_syncs(self, ticket_type, passed):
+        for list_type in self.LIST_CHANGES.get((ticket_type, passed), ()):
+            await self.schedule_sheet_sync(list_type)
+    
+    async def _send_cached(self, interaction, list_type, format_type, path):
+        format_name = self.FORMAT_NAMES.get(format_type, format_type)
+        size = os.path.getsize(path)
+        filename = f"{list_type}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{obrc_export.FILE_EXTENSIONS[format_type]}"
+        embed = discord.Embed(
+            title="✅ Export Complete",
+            colour=discord.Colour.green(),
+            description=f"The {list_type} has not changed since the last {format_name} export, so the cached file was reused ({size / 1024:.0f} KB)."
+        )
+        await interaction.followup.send(embed=embed, file=discord.File(path, filename=filename), ephemeral=True)
+    
+    async def cancel(self, job):
+        if job.finished:
+            return
+        self.cancelled[job.id] = True
+        if job.status == "queued":
+            job.status = "cancelled"
+            await self._finish(job)
+    
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:-50]:
+            self.jobs.pop(job_id, None)
+    
+    def _update_gauges(self):
+        for status in ("queued", "running"):
+            metrics.set_gauge("obrc_export_jobs", sum(1 for job in self.jobs.values() if job.status == status), {"status": status})
+    
+    def _progress_embed(self, job):
+        format_name = self.FORMAT_NAMES.get(job.format_type, job.format_type)
+        if job.status == "queued":
+            position = sum(1 for other in self.jobs.values() if other.status == "queued" and other.id < job.id) + 1
+            title = "⏳ Export Queued"
+            colour = discord.Colour.light_grey()
+            state = f"Waiting for a free export slot (position {position} in queue)."
+        elif job.status == "running":
+            title = "⚙️ Export Running"
+            colour = discord.Colour.blue()
+            state = f"**Rows exported:** {job.rows}\n**Elapsed:** {time.monotonic() - job.started:.0f}s"
+        elif job.status == "completed":
+            title = "✅ Export Complete"
+            colour = discord.Colour.green()
+            state = f"**Rows exported:** {job.rows}\n**Took:** {job.ended - job.started:.1f}s"
+        elif job.status == "cancelled":
+            title = "🛑 Export Cancelled"
+            colour = discord.Colour.orange()
+            state = f"Cancelled after {job.rows} row(s)."
+        else:
+            title = "❌ Export Failed"
+            colour = discord.Colour.red()
+            state = f"Failed to export data: {job.error}"
+        
+        return discord.Embed(
+            title=title,
+            colour=colour,
+            description=f"**Job:** #{job.id}\n**List:** {job.list_type}\n**Format:** {format_name}\n{state}"
+        )
+    
+    async def _update_message(self, job):
+        if not job.message:
+            return
+        try:
+            await job.message.edit(embed=self._progress_embed(job), view=None if job.finished else ExportJobView(job.id))
+        except discord.HTTPException as e:
+            print(f"Error updating export job #{job.id} progress: {e}")
+    
+    @instrumented("task", "export_job")
+    async def _run(self, job):
+        sync_lock = self.sync_locks.setdefault(job.list_type, asyncio.Lock()) if job.format_type == "google_sheets_sync" else contextlib.nullcontext()
+        try:
+            async with sync_lock, self.semaphore:
+                if job.status == "cancelled":
+                    return
+                job.status = "running"
+                job.started = time.monotonic()
+                self._update_gauges()
+                await self._update_message(job)
+                
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(
+                    self.pool,
+                    functools.partial(obrc_export.run_export_job, job.id, job.list_type, job.format_type, EXPORT_OUTPUT_DIR, self.progress, self.cancelled)
+                )
+                while True:
+                    done, _ = await asyncio.wait({future}, timeout=EXPORT_PROGRESS_INTERVAL)
+                    job.rows = self.progress.get(job.id, job.rows)
+                    if done:
+                        break
+                    await self._update_message(job)
+                
+                job.result = future.result()
+                job.rows = job.result["rows"]
+                for name, amount in job.result.get("sheets", {}).items():
+                    metrics.inc(f"obrc_sheets_{name}_total", amount=amount)
+                job.status = "completed"
+        except obrc_export.ExportCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"Error running export job #{job.id}: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            if not job.finished:
+                job.status = "cancelled"
+            await self._finish(job)
+    
+    async def _finish(self, job):
+        if job.ended is not None:
+            return
+        job.ended = time.monotonic()
+        job.started = job.started or job.ended
+        self.progress.pop(job.id, None)
+        self.cancelled.pop(job.id, None)
+        self._update_gauges()
+        metrics.inc("obrc_export_jobs_total", {"format": job.format_type, "status": job.status})
+        if job.status == "completed":
+            metrics.observe("obrc_export_job_duration_seconds", job.ended - job.started, {"format": job.format_type})
+        await self._update_message(job)
+        
+        if job.status == "completed":
+            await self._deliver(job)
+    
+    async def _deliver(self, job):
+        result = job.result
+        if not result["rows"] and not result["url"]:
+            embed = discord.Embed(
+                title="❌ No Data",
+                colour=discord.Colour.orange(),
+                description=f"No records found in the {job.list_type} to export."
+            )
+            await self._send_to_owner(job, embed)
+            return
+        
+        format_name = self.FORMAT_NAMES.get(job.format_type, job.format_type)
+        if result["url"] and "inserted" in result:
+            print(f"Synced {job.list_type} sheet: {result['inserted']} inserted, {result['updated']} updated, {result['deleted']} deleted")
+            embed = discord.Embed(
+                title="✅ Sheet Synced",
+                colour=discord.Colour.green(),
+                description=f"Synced {result['rows']} records from {job.list_type} to its Google Sheet.\n"
+                           f"**Inserted:** {result['inserted']} | **Updated:** {result['updated']} | **Deleted:** {result['deleted']}\n"
+                           f"[Click here to view]({result['url']})"
+            )
+            await self._send_to_owner(job, embed)
+            return
+        
+        if result["url"]:
+            embed = discord.Embed(
+                title="✅ Export Complete",
+                colour=discord.Colour.green(),
+                description=f"Exported {result['rows']} records from {job.list_type} to {format_name}.\n[Click here to view]({result['url']})"
+            )
+            await self._send_to_owner(job, embed)
+            return
+        
+        upload_limit = job.interaction.guild.filesize_limit if job.interaction.guild else DISCORD_UPLOAD_LIMIT
+        if result["bytes"] > upload_limit:
+            embed = discord.Embed(
+                title="❌ Export Too Large",
+                colour=discord.Colour.red(),
+                description=f"The {format_name} export of {result['rows']} records is {result['bytes'] / 1048576:.1f} MB, "
+                           f"above Discord's {upload_limit / 1048576:.0f} MB upload limit. Try the CSV, JSON Lines or Parquet format."
+            )
+            await self._send_to_owner(job, embed)
+            os.remove(result["path"])
+            return
+        
+        embed = discord.Embed(
+            title="✅ Export Complete",
+            colour=discord.Colour.green(),
+            description=f"Exported {result['rows']} records from {job.list_type} to {format_name} file ({result['bytes'] / 1024:.0f} KB)."
+        )
+        path = result["path"]
+        if job.cache_key:
+            try:
+                path = export_cache.put(job.cache_key, job.format_type, path)
+            except OSError as e:
+                print(f"Error caching export job #{job.id}: {e}")
+        
+        try:
+            await self._send_to_owner(job, embed, path, result["filename"])
+        finally:
+            if path == result["path"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    async def _send_to_owner(self, job, embed, path=None, filename=None):
+        if job.interaction is None:
+            return
+        try:
+            if path:
+                await job.interaction.followup.send(embed=embed, file=discord.File(path, filename=filename), ephemeral=True)
+            else:
+                await job.interaction.followup.send(embed=embed, ephemeral=True)
+        except discord.HTTPException as e:
+            print(f"Export job #{job.id} followup failed ({e}), sending by DM")
+            try:
+                if path:
+                    await job.user.send(embed=embed, file=discord.File(path, filename=filename))
+                else:
+                    await job.user.send(embed=embed)
+            except Exception as e:
+                print(f"Error delivering export job #{job.id}: {e}")
+
+metrics.describe("obrc_sheets_api_calls_total", "counter", "Google Sheets/Drive API requests made by export workers")
+metrics.describe("obrc_sheets_token_refreshes_total", "counter", "Google OAuth token refreshes made by export workers")
+metrics.describe("obrc_export_cache_requests_total", "counter", "Export cache lookups by result")
+metrics.describe("obrc_export_cache_bytes", "gauge", "Bytes held in the on-disk export cache")
+metrics.describe("obrc_export_jobs", "gauge", "Export jobs currently queued or running")
+metrics.describe("obrc_export_jobs_total", "counter", "Finished export jobs by format and final status")
+metrics.describe("obrc_export_job_duration_seconds", "histogram", "Wall time of completed export jobs")
+
+
+metrics.describe("obrc_ticket_overflow_categories_created_total", "counter", "Overflow ticket categories created when every managed category was full")
+metrics.describe("obrc_ticket_category_channels", "gauge", "Channels counted against the 50-channel limit per ticket category")
+metrics.describe("obrc_ticket_leases_total", "counter", "Expired voting/evidence rows leased by this worker, fresh claims and takeovers")
+metrics.describe("obrc_member_lookups_total", "counter", "Member lookups by source (cache, rest, chunk)")
+metrics.describe("obrc_gateway_events_total", "counter", "Gateway dispatch events received by type")
+
+
+def gateway_options(profile):
+    """`full` keeps the old chunk-everything setup; `lean` only subscribes to what the bot handles."""
+    if profile == "full":
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        return {"intents": intents}
+    
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    intents.guild_messages = True
+    intents.guild_polls = True
+    intents.message_content = GATEWAY_MESSAGE_CONTENT
+    return {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags(joined=True, voice=False),
+        "chunk_guilds_at_startup": False,
+    }
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix="$", intents=intents)
+bot = commands.Bot(command_prefix="$", **gateway_options(GATEWAY_PROFILE))
+instrument_http(bot)
 
 blacklist_manager = BlacklistManager()
+list_store = ListStore()
+known_ids = KnownIdSnapshot()
+change_feed = ChangeFeed(list_store)
+metrics.describe("obrc_change_events_total", "counter", "Row change events applied to the in-memory list store")
+metrics.describe("obrc_list_store_rows", "gauge", "Rows held in the in-memory list store by table")
+metrics.describe("obrc_known_id_checks_total", "counter", "Person lookups outside the list store by known-ID snapshot result")
+metrics.describe("obrc_known_ids", "gauge", "Discord IDs in the known-ID snapshot")
+metrics.describe("obrc_known_ids_bytes", "gauge", "Memory held by the known-ID snapshot")
 voting_manager = VotingTicketManager()
 auto_role_manager = AutoRoleManager()
+member_lookup = MemberLookup()
+ticket_placement = TicketPlacement()
+guild_configs = GuildConfigStore()
+voter_digest = VoterDigest()
+export_cache = ExportCache()
+export_job_manager = ExportJobManager()
 
 
 
@@ -1297,9 +3594,10 @@ auto_role_manager = AutoRoleManager()
 
 @bot.tree.command(name="search_list", description="Search the blacklist and greylist")
 @app_commands.describe(name="The member to check")
+@instrumented("command", "search_list")
 async def search_list(interaction: discord.Interaction, name: discord.Member):
     await interaction.response.defer()
-    if not (any(role.name == OBRC_MEMBER_NAME for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_member(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
     record = await blacklist_manager.search_person(name.id)
@@ -1349,7 +3647,68 @@ async def search_list(interaction: discord.Interaction, name: discord.Member):
 
 
 
+@bot.tree.command(name="alt_network", description="Show every account and list entry linked to a user through alts")
+@app_commands.describe(user="The user (or user ID) to start from")
+@instrumented("command", "alt_network")
+async def alt_network(interaction: discord.Interaction, user: discord.User):
+    await interaction.response.defer()
+    if not guild_configs.get(interaction.guild).is_member(interaction.user):
+        return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
+    
+    try:
+        accounts, entries, truncated = await blacklist_manager.alt_network(user.id)
+    except Exception as e:
+        print(f"Error walking alt network: {e}")
+        embed = discord.Embed(
+            title="❌ Search Error",
+            colour=discord.Colour.red(),
+            description="The lists could not be read, so the alt network is unknown. Please try again."
+        )
+        return await interaction.followup.send(embed=embed)
+    
+    if not entries:
+        embed = discord.Embed(
+            title="✅ No Alt Network",
+            colour=discord.Colour.green(),
+            description=f"**{user.mention}** is not linked to any blacklist or greylist entry."
+        )
+        return await interaction.followup.send(embed=embed)
+    
+    blacklisted = any(entry.get('list_type') == 'blacklist' for entry in entries)
+    entries = sorted(entries, key=lambda entry: (entry.get('list_type') != 'blacklist', str(entry.get('date_added') or '')))
+    
+    lines = []
+    for entry in entries:
+        icon = "🚨" if entry.get('list_type') == 'blacklist' else "⚠️"
+        primary = f"<@{entry.get('discord_id')}>" if entry.get('discord_id') else entry.get('discord_name', 'Unknown')
+        nation = f" · [Nation]({entry.get('nation_url')})" if entry.get('nation_url') else ""
+        lines.append(f"{icon} {primary}{nation} — {entry.get('reason', 'N/A')}")
+    
+    entry_text = ""
+    for shown, line in enumerate(lines):
+        if len(entry_text) + len(line) > 3500:
+            entry_text += f"… and {len(lines) - shown} more entries"
+            break
+        entry_text += line + "\n"
+    
+    account_text = ", ".join(f"<@{account}>" for account in accounts)
+    if len(account_text) > 1000:
+        account_text = account_text[:account_text.rfind(",", 0, 990)] + ", …"
+    
+    embed = discord.Embed(
+        title="🕸️ Alt Network",
+        colour=discord.Colour.red() if blacklisted else discord.Colour.orange(),
+        description=(
+            f"**{user.mention}** is linked to **{len(accounts)} account(s)** through **{len(entries)} list entr{'y' if len(entries) == 1 else 'ies'}**"
+            + (" (network truncated)" if truncated else "")
+            + f"\n\n{entry_text}"
+        )
+    )
+    embed.add_field(name="Accounts", value=account_text, inline=False)
+    await interaction.followup.send(embed=embed)
+
 @bot.tree.command(name="propose_add_company", description="Propose adding a company to the blacklist (creates voting ticket)")
+@instrumented("command", "propose_add_company")
 async def propose_add_company(
     interaction: discord.Interaction,
     company_name: str,
@@ -1362,7 +3721,7 @@ async def propose_add_company(
     proof3: discord.Attachment = None
 ):
     await interaction.response.defer(ephemeral=True)
-    if not (any(role.id == COMMISSIONER_ID for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_commissioner(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
     if not company_name or not owner or not reason or not proof:
@@ -1434,6 +3793,7 @@ async def propose_add_company(
     await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="appeal_company", description="Appeal a company blacklist entry (if you're the owner)")
+@instrumented("command", "appeal_company")
 async def appeal_company(
     interaction: discord.Interaction,
     company_name: str,
@@ -1534,9 +3894,10 @@ async def appeal_company(
 
 @bot.tree.command(name="search_nation", description="Search the blacklist and greylist by nation ID or URL")
 @app_commands.describe(nation="Nation ID (e.g., 680627) or URL (e.g., politicsandwar.com/nation/id=680627)")
+@instrumented("command", "search_nation")
 async def search_nation(interaction: discord.Interaction, nation: str):
     await interaction.response.defer()
-    if not (any(role.name == OBRC_MEMBER_NAME for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_member(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
     record = await blacklist_manager.search_by_nation(nation)
@@ -1595,6 +3956,7 @@ async def search_nation(interaction: discord.Interaction, nation: str):
     await interaction.followup.send(embed=embed)
 
 @bot.tree.command(name="propose_add", description="Propose adding a person to the blacklist (creates voting ticket)")
+@instrumented("command", "propose_add")
 async def propose_add(
     interaction: discord.Interaction,
     name: str,
@@ -1607,7 +3969,7 @@ async def propose_add(
     pos_alts: str = None
 ):
     await interaction.response.defer(ephemeral=True)
-    if not (any(role.id == COMMISSIONER_ID for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_commissioner(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
 
     if not name and not nation_id:
@@ -1692,6 +4054,7 @@ async def propose_add(
     await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="appeal", description="Appeal your own blacklist entry")
+@instrumented("command", "appeal")
 async def appeal(
     interaction: discord.Interaction,
     reason: str
@@ -1780,6 +4143,7 @@ async def appeal(
     await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="add_evidence", description="Submit additional evidence with voting for acceptance")
+@instrumented("command", "add_evidence")
 async def add_evidence(
     interaction: discord.Interaction,
     evidence: discord.Attachment,
@@ -1788,7 +4152,7 @@ async def add_evidence(
     await interaction.response.defer(ephemeral=True)
     
 
-    result = supabase.table("voting_tickets").select("*").eq("ticket_channel_id", str(interaction.channel.id)).eq("status", "active").execute()
+    result = await supabase.table("voting_tickets").select("*").eq("ticket_channel_id", str(interaction.channel.id)).eq("status", "active").execute()
     
     if not result.data:
         embed = discord.Embed(
@@ -1841,7 +4205,7 @@ async def add_evidence(
         "expires_at": expires_at.isoformat()
     }
     
-    supabase.table("evidence_votes").insert(evidence_data).execute()
+    await outbox.upsert("evidence_votes", evidence_data, on_conflict="message_id")
     
 
     confirm_embed = discord.Embed(
@@ -1866,6 +4230,7 @@ async def add_evidence(
     app_commands.Choice(name="Blacklist only", value="blacklist"),
     app_commands.Choice(name="Greylist only", value="greylist")
 ])
+@instrumented("command", "edit_entry")
 async def edit_entry(
     interaction: discord.Interaction,
     names: str,
@@ -1879,7 +4244,7 @@ async def edit_entry(
     pos_alts: str = None
 ):
     await interaction.response.defer(ephemeral=True)
-    if not (any(role.id == COMMISSIONER_ID for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_commissioner(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
 
@@ -2075,6 +4440,7 @@ async def edit_entry(
     app_commands.Choice(name="Blacklist only", value="blacklist"),
     app_commands.Choice(name="Greylist only", value="greylist")
 ])
+@instrumented("command", "edit_company_entry")
 async def edit_company_entry(
     interaction: discord.Interaction,
     company_names: str,
@@ -2241,9 +4607,10 @@ async def edit_company_entry(
     await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="search_company", description="Search the company blacklist and greylist by name")
+@instrumented("command", "search_company")
 async def search_company(interaction: discord.Interaction, company_name: str):
     await interaction.response.defer()
-    if not (any(role.name == OBRC_MEMBER_NAME for role in interaction.user.roles)):
+    if not guild_configs.get(interaction.guild).is_member(interaction.user):
         return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
     record = await blacklist_manager.search_company(company_name)
@@ -2295,7 +4662,11 @@ async def search_company(interaction: discord.Interaction, company_name: str):
 )
 @app_commands.choices(format_type=[
     app_commands.Choice(name="Excel (.xlsx)", value="excel"),
-    app_commands.Choice(name="Google Sheets", value="google_sheets")
+    app_commands.Choice(name="CSV (.csv.gz)", value="csv"),
+    app_commands.Choice(name="JSON Lines (.jsonl.gz)", value="jsonl"),
+    app_commands.Choice(name="Parquet (.parquet)", value="parquet"),
+    app_commands.Choice(name="Google Sheets", value="google_sheets"),
+    app_commands.Choice(name="Google Sheets (synced, one sheet per list)", value="google_sheets_sync")
 ])
 @app_commands.choices(list_type=[
     app_commands.Choice(name="Blacklist (People)", value="blacklist"),
@@ -2303,79 +4674,16 @@ async def search_company(interaction: discord.Interaction, company_name: str):
     app_commands.Choice(name="Company Blacklist", value="blacklist_coo"),
     app_commands.Choice(name="Company Greylist", value="greylist_coo")
 ])
+@instrumented("command", "export")
 async def export_blacklist(interaction: discord.Interaction, format_type: str, list_type: str = "blacklist"):
     await interaction.response.defer(ephemeral=True)
 
-    if not any(role.name in OBRC_MEMBER_NAME for role in interaction.user.roles):
+    if not guild_configs.get(interaction.guild).is_member(interaction.user):
         await interaction.followup.send("You don’t have permission to use this.", ephemeral=True)
         return
     
     try:
-        records = await blacklist_manager.get_all_records(list_type)
-        
-        if not records:
-            embed = discord.Embed(
-                title="❌ No Data",
-                colour=discord.Colour.orange(),
-                description=f"No records found in the {list_type} to export."
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
-            return
-        
-        df = pd.DataFrame(records)
-        if 'id' in df.columns:
-            df = df.drop('id', axis=1)
-        
-        if format_type == "excel":
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name=list_type.title())
-            
-            buffer.seek(0)
-            file = discord.File(buffer, filename=f"{list_type}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
-            
-            embed = discord.Embed(
-                title="✅ Export Complete",
-                colour=discord.Colour.green(),
-                description=f"Exported {len(records)} records from {list_type} to Excel file."
-            )
-            
-            await interaction.followup.send(embed=embed, file=file, ephemeral=True)
-            
-        elif format_type == "google_sheets":
-            try:
-                client = get_client()
-                
-                sheet_name = f"{list_type.title()} Export {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                spreadsheet = client.create(sheet_name)
-                worksheet = spreadsheet.sheet1
-                
-                headers = list(df.columns)
-                worksheet.insert_row(headers, 1)
-                
-
-                for i, row in df.iterrows():
-                    worksheet.insert_row(list(row), i + 2)
-                
-
-                spreadsheet.share('', perm_type='anyone', role='reader')
-                
-                embed = discord.Embed(
-                    title="✅ Export Complete",
-                    colour=discord.Colour.green(),
-                    description=f"Exported {len(records)} records from {list_type} to Google Sheets.\n[Click here to view]({spreadsheet.url})"
-                )
-                
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                
-            except Exception as e:
-                embed = discord.Embed(
-                    title="❌ Export Failed",
-                    colour=discord.Colour.red(),
-                    description=f"Failed to export to Google Sheets: {str(e)}"
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-    
+        await export_job_manager.submit(interaction, list_type, format_type)
     except Exception as e:
         embed = discord.Embed(
             title="❌ Export Failed",
@@ -2385,25 +4693,33 @@ async def export_blacklist(interaction: discord.Interaction, format_type: str, l
         await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.event
+@instrumented("event", "on_member_join")
 async def on_member_join(member):
     try:
         await auto_role_manager.check_and_assign_roles(member)
     except Exception as e:
         print(f"Error in on_member_join auto-role: {e}")
 
+async def find_ticket_by_poll(poll_message_id):
+    if list_store.ready:
+        return list_store.ticket_by_poll(poll_message_id)
+    result = await supabase.table("voting_tickets").select("*").eq("poll_message_id", str(poll_message_id)).execute()
+    return result.data[0] if result.data else None
+
 @bot.event
+@instrumented("event", "on_poll_vote_add")
 async def on_poll_vote_add(poll_vote):
     try:
         poll = poll_vote.poll
 
 
-        result = supabase.table("voting_tickets").select("*").eq("poll_message_id", str(poll.message_id)).execute()
-        
-        if not result.data:
+        ticket = await find_ticket_by_poll(poll.message_id)
+        if not ticket:
             return
 
-        guild = bot.get_guild(1319746765771116615)
-        user = guild.get_member(poll_vote.user_id) if guild else None
+        channel = bot.get_channel(int(ticket['ticket_channel_id']))
+        guild = channel.guild if channel else None
+        user = (guild.get_member(poll_vote.user_id) if guild else None) or poll_vote.user_id
 
         answer_text = poll.answers[poll_vote.answer_id].text if 0 <= poll_vote.answer_id < len(poll.answers) else "Unknown"
 
@@ -2413,17 +4729,18 @@ async def on_poll_vote_add(poll_vote):
         print(f"Error in on_poll_vote_add: {e}")
 
 @bot.event
+@instrumented("event", "on_poll_vote_remove")
 async def on_poll_vote_remove(poll_vote):
     try:
         poll = poll_vote.poll
 
-        result = supabase.table("voting_tickets").select("*").eq("poll_message_id", str(poll.message_id)).execute()
-        
-        if not result.data:
+        ticket = await find_ticket_by_poll(poll.message_id)
+        if not ticket:
             return
 
-        guild = bot.get_guild(1319746765771116615)
-        user = guild.get_member(poll_vote.user_id) if guild else None
+        channel = bot.get_channel(int(ticket['ticket_channel_id']))
+        guild = channel.guild if channel else None
+        user = (guild.get_member(poll_vote.user_id) if guild else None) or poll_vote.user_id
 
         answer_text = poll.answers[poll_vote.answer_id].text if 0 <= poll_vote.answer_id < len(poll.answers) else "Unknown"
 
@@ -2433,28 +4750,237 @@ async def on_poll_vote_remove(poll_vote):
         print(f"Error in on_poll_vote_remove: {e}")
 
 @bot.event
-async def on_ready():
-    print(f'🤖 {bot.user} is ready!')
-    print(f'📊 Supabase connected successfully')
+async def on_socket_event_type(event_type):
+    metrics.inc("obrc_gateway_events_total", {"type": event_type})
+
+@bot.tree.command(name="notifications", description="Choose how you are notified about new votes")
+@app_commands.describe(delivery="Immediate DM per new vote, or one digest DM per window")
+@app_commands.choices(delivery=[
+    app_commands.Choice(name="Immediate", value="immediate"),
+    app_commands.Choice(name="Digest", value="digest")
+])
+@instrumented("command", "notifications")
+async def notifications(interaction: discord.Interaction, delivery: str):
+    await interaction.response.defer(ephemeral=True)
+    
     try:
-        synced = await bot.tree.sync()
-        print(f'⚡ Synced {len(synced)} slash command(s)')
+        await voter_digest.set_delivery(interaction.user.id, delivery)
     except Exception as e:
-        print(f'❌ Failed to sync commands: {e}')
+        await interaction.followup.send(f"❌ Failed to save your preference: {e}", ephemeral=True)
+        return
     
+    if delivery == "digest":
+        description = f"You'll get one DM every {VOTER_DIGEST_WINDOW // 60} minutes listing all open votes, when new ones have opened."
+    else:
+        description = "You'll get a DM as soon as each new vote opens."
+    embed = discord.Embed(title="🔔 Notification Preference Saved", colour=discord.Colour.green(), description=description)
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
-    bot.loop.create_task(poll_checker_task())
+@bot.tree.command(name="loop_lag", description="Show event-loop lag statistics and recent stalls (admin only)")
+@app_commands.default_permissions(administrator=True)
+@instrumented("command", "loop_lag")
+async def loop_lag(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if not is_admin(interaction.user):
+        return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
+    
+    if not loop_lag_monitor.running:
+        embed = discord.Embed(
+            title="⏱️ Loop Lag Monitor Disabled",
+            colour=discord.Colour.orange(),
+            description="Set `LOOP_LAG_MONITOR=1` and restart the bot to enable the event-loop lag monitor."
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+    
+    samples = len(loop_lag_monitor.samples)
+    embed = discord.Embed(
+        title="⏱️ Event-Loop Lag",
+        colour=discord.Colour.blue(),
+        description=f"**Samples:** {samples} (every {loop_lag_monitor.interval * 1000:.0f} ms)\n"
+                   f"**p50:** {loop_lag_monitor.percentile(0.50) * 1000:.1f} ms\n"
+                   f"**p95:** {loop_lag_monitor.percentile(0.95) * 1000:.1f} ms\n"
+                   f"**p99:** {loop_lag_monitor.percentile(0.99) * 1000:.1f} ms\n"
+                   f"**Max:** {max(loop_lag_monitor.samples, default=0) * 1000:.1f} ms\n"
+                   f"**Stall threshold:** {loop_lag_monitor.threshold * 1000:.0f} ms",
+        timestamp=datetime.utcnow()
+    )
+    
+    counts = loop_lag_monitor.histogram()
+    labels = [f"≤{bound * 1000:g} ms" for bound in LOOP_LAG_BUCKETS] + [f">{LOOP_LAG_BUCKETS[-1] * 1000:g} ms"]
+    peak = max(counts) or 1
+    histogram_lines = [f"{label:>10} {'█' * math.ceil(20 * count / peak) if count else ''} {count}" for label, count in zip(labels, counts)]
+    embed.add_field(name="Histogram", value="```\n" + "\n".join(histogram_lines) + "\n```", inline=False)
+    
+    if loop_lag_monitor.stalls:
+        stall_lines = []
+        for stall in list(loop_lag_monitor.stalls)[-5:]:
+            duration = f"{stall['duration'] * 1000:.0f} ms" if stall['duration'] is not None else "ongoing"
+            stall_lines.append(f"`{stall['at'].strftime('%H:%M:%S')}` **{stall['task']}** {duration}\n↳ `{stall['culprit']}` from `{stall['call_site']}`")
+        embed.add_field(name="Recent Stalls", value="\n".join(stall_lines)[:1024], inline=False)
+    
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
-async def poll_checker_task():
-    await bot.wait_until_ready()
+async def profile_target_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in sorted(instrumented_handlers)
+        if current.lower() in name.lower()
+    ][:25]
+
+@bot.tree.command(name="profile", description="Sample a live command or task and return collapsed stacks (admin only)")
+@app_commands.describe(
+    target="Command, event or task name to profile (e.g. edit_entry, export, check_expired_polls)",
+    duration="Maximum seconds to profile (up to 600)",
+    invocations="Stop after this many completed invocations of the target"
+)
+@app_commands.autocomplete(target=profile_target_autocomplete)
+@app_commands.default_permissions(administrator=True)
+@instrumented("command", "profile")
+async def profile(interaction: discord.Interaction, target: str, duration: int = 60, invocations: int = None):
+    await interaction.response.defer(ephemeral=True)
+    if not is_admin(interaction.user):
+        return await interaction.followup.send("You don't have the required permission level", ephemeral=True)
     
-    while not bot.is_closed():
+    if target not in instrumented_handlers:
+        embed = discord.Embed(
+            title="❌ Unknown Target",
+            colour=discord.Colour.red(),
+            description=f"**{target}** is not an instrumented command, event or task.\n\n"
+                       f"**Known targets:** {', '.join(sorted(instrumented_handlers))}"
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+    
+    duration = max(1, min(PROFILE_MAX_DURATION, duration))
+    if invocations is not None:
+        invocations = max(1, min(PROFILE_MAX_INVOCATIONS, invocations))
+    
+    if sampling_profiler.active:
+        embed = discord.Embed(
+            title="❌ Profiler Busy",
+            colour=discord.Colour.orange(),
+            description=f"A profiling session for **{sampling_profiler.session['target']}** is already running."
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+    
+    limit_text = f" or {invocations} invocation(s)" if invocations else ""
+    await interaction.followup.send(f"🔬 Profiling **{target}** for up to {duration}s{limit_text}...", ephemeral=True)
+    
+    session = await sampling_profiler.profile(target, duration, invocations)
+    
+    matched = session["matched_samples"]
+    top_frames = sorted(session["leaves"].items(), key=lambda item: -item[1])[:10]
+    top_text = "\n".join(f"`{count / matched:6.1%}` {frame}" for frame, count in top_frames) if matched else "No samples captured while the target was running on the event loop."
+    
+    embed = discord.Embed(
+        title=f"🔬 Profile: {target}",
+        colour=discord.Colour.blue(),
+        description=f"**Elapsed:** {session['elapsed']:.1f}s\n"
+                   f"**Invocations completed:** {session['invocations']}\n"
+                   f"**Samples:** {matched} on-loop in target / {session['total_samples']} total "
+                   f"(every {sampling_profiler.interval * 1000:.0f} ms)",
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Top Frames (self)", value=top_text[:1024], inline=False)
+    
+    profile_file = discord.File(
+        io.BytesIO(sampling_profiler.collapsed(session).encode()),
+        filename=f"profile_{target}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+    )
+    await interaction.followup.send(embed=embed, file=profile_file, ephemeral=True)
+
+COMMAND_SYNC_STATE = os.getenv("COMMAND_SYNC_STATE", "command_tree.sha256")
+
+def command_tree_hash():
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands()),
+        key=lambda command: (command.get("type", 1), command["name"])
+    )
+    return hashlib.sha256(
+        json.dumps([bot.application_id, payload], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+async def sync_commands_if_changed():
+    """Upload the command tree only when it differs from the last successful sync."""
+    tree_hash = command_tree_hash()
+    try:
+        with open(COMMAND_SYNC_STATE) as state:
+            if state.read().strip() == tree_hash:
+                print(f'⚡ Slash commands unchanged ({tree_hash[:12]}), skipping sync')
+                return
+    except FileNotFoundError:
+        pass
+    
+    synced = await bot.tree.sync()
+    temp_path = f"{COMMAND_SYNC_STATE}.tmp"
+    with open(temp_path, "w") as state:
+        state.write(tree_hash)
+    os.replace(temp_path, COMMAND_SYNC_STATE)
+    print(f'⚡ Synced {len(synced)} slash command(s) ({tree_hash[:12]})')
+
+@bot.event
+async def setup_hook():
+    if METRICS_PORT:
         try:
-            await voting_manager.check_expired_polls(bot)
+            await metrics.start_server(METRICS_HOST, METRICS_PORT)
         except Exception as e:
-            print(f"Error in poll checker task: {e}")
-        
+            print(f"❌ Failed to start metrics endpoint: {e}")
+    
+    if LOOP_LAG_MONITOR:
+        loop_lag_monitor.start()
+    
+    task_supervisor.start("outbox", outbox.run)
+    await guild_configs.load()
+    
+    if RUN_MODE != "worker":
+        await voter_digest.load()
+        task_supervisor.start("voter_digest", voter_digest.run)
+        if CHANGE_FEED == "realtime":
+            task_supervisor.start("change_feed", change_feed.run)
+        try:
+            await sync_commands_if_changed()
+        except Exception as e:
+            print(f'❌ Failed to sync commands: {e}')
+    
+    if RUN_MODE != "gateway":
+        task_supervisor.start("poll_checker", poll_checker_task)
 
-        await asyncio.sleep(300)
+@bot.event
+async def on_ready():
+    print(f'🤖 {bot.user} is ready!')
+    print(f'📊 Supabase connected successfully')
+    print(f'🛰️ Gateway profile: {GATEWAY_PROFILE} ({len(bot.users)} users cached)')
+    guild_configs.invalidate()
+    report_startup()
+
+@bot.event
+async def on_guild_role_delete(role):
+    guild_configs.invalidate(role.guild.id)
 
-bot.run(os.getenv("BOT_KEY"))
\ No newline at end of file
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_configs.invalidate(channel.guild.id)
+
+async def poll_checker_task():
+    if RUN_MODE != "worker":
+        await bot.wait_until_ready()
+    
+    while not bot.is_closed():
+        await voting_manager.check_expired_polls(bot)
+        await asyncio.sleep(POLL_CHECK_INTERVAL)
+
+async def run_worker():
+    """Expiry engine without a gateway connection; slash commands and events stay with the gateway process."""
+    discord.utils.setup_logging()
+    async with bot:
+        await bot.login(os.getenv("BOT_KEY"))
+        print(f'🛠️ Expiry worker {WORKER_ID} running as {bot.user}')
+        await task_supervisor.tasks["poll_checker"]
+
+if __name__ == "__main__":
+    if RUN_MODE == "worker":
+        asyncio.run(run_worker())
+    else:
+        bot.run(os.getenv("BOT_KEY"))
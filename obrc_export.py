@@ -0,0 +1,450 @@
+import csv
+import gzip
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+SHEETS_BATCH_ROWS = 500
+GZIP_LEVEL = 6
+SHEETS_SYNC_STATE_DIR = os.getenv("SHEETS_SYNC_STATE_DIR", "sheets_sync_state")
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+SHEETS_TOKEN_REFRESH_MARGIN = int(os.getenv("SHEETS_TOKEN_REFRESH_MARGIN", "300"))
+
+PERSON_COLUMNS = (
+    "id", "discord_id", "discord_name", "nation_id", "nation_url", "possible_alts",
+    "reason", "proof_urls", "added_by", "date_added", "last_modified", "modified_by",
+)
+COMPANY_COLUMNS = (
+    "id", "company_name", "owner", "personnel", "alts",
+    "reason", "proof_urls", "added_by", "date_added", "last_modified", "modified_by",
+)
+EXPORT_COLUMNS = {
+    "blacklist": PERSON_COLUMNS,
+    "greylist": PERSON_COLUMNS,
+    "blacklist_coo": COMPANY_COLUMNS,
+    "greylist_coo": COMPANY_COLUMNS,
+}
+FILE_EXTENSIONS = {
+    "excel": "xlsx",
+    "csv": "csv.gz",
+    "jsonl": "jsonl.gz",
+    "parquet": "parquet",
+}
+
+_client = None
+
+
+def lazy_import(name):
+    """Import a heavy export dependency on first use instead of at bot startup."""
+    module = sys.modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+    return module
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def get_storage_client():
+    global _client
+    if _client is None:
+        _client = lazy_import("supabase").create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _client
+
+
+def get_credentials():
+    creds_str = os.getenv("GOOGLE_CREDENTIALS")
+    if not creds_str:
+        raise RuntimeError("GOOGLE_CREDENTIALS not found in environment.")
+    try:
+        creds_json = json.loads(creds_str)
+        return creds_json
+    except Exception as e:
+        raise RuntimeError(f"Failed to load GOOGLE_CREDENTIALS: {e}")
+
+
+class SheetsClientProvider:
+    def __init__(self, refresh_margin=SHEETS_TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self._client = None
+        self._lock = threading.Lock()
+        self._calls_lock = threading.Lock()
+        self.token_refreshes = 0
+        self.api_calls = 0
+
+    def _http(self):
+        return getattr(self._client, "http_client", self._client)
+
+    def _create(self):
+        client = lazy_import("gspread").service_account_from_dict(get_credentials(), scopes=SHEETS_SCOPE)
+        session = getattr(client, "http_client", client).session
+        original_request = session.request
+
+        # Token refreshes in login() go through this session while get() holds _lock,
+        # so the call counter needs a lock of its own.
+        def request(*args, **kwargs):
+            with self._calls_lock:
+                self.api_calls += 1
+            return original_request(*args, **kwargs)
+
+        session.request = request
+        return client
+
+    def _refresh_if_needed(self):
+        http = self._http()
+        expiry = getattr(http.auth, "expiry", None)
+        if http.auth.token and expiry and expiry - datetime.utcnow() > self.refresh_margin:
+            return
+        http.login()
+        self.token_refreshes += 1
+
+    def get(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._create()
+            self._refresh_if_needed()
+            return self._client
+
+    def stats(self):
+        with self._lock, self._calls_lock:
+            return {"token_refreshes": self.token_refreshes, "api_calls": self.api_calls}
+
+
+sheets_client = SheetsClientProvider()
+
+
+def get_client():
+    return sheets_client.get()
+
+
+def iter_record_pages(client, list_type, page_size=EXPORT_PAGE_SIZE):
+    start = 0
+    while True:
+        result = (
+            client.table(list_type)
+            .select("*")
+            .order("date_added", desc=True)
+            .order("id")
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        rows = result.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+
+def export_columns(list_type, first_row):
+    known = EXPORT_COLUMNS.get(list_type, ())
+    extra = sorted(column for column in first_row.keys() if column not in known)
+    return list(known) + extra
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class ExportProgress:
+    def __init__(self, job_id, progress, cancelled):
+        self.job_id = job_id
+        self.progress = progress
+        self.cancelled = cancelled
+        self.rows = 0
+
+    def advance(self, rows):
+        self.rows += rows
+        if self.progress is not None:
+            self.progress[self.job_id] = self.rows
+        if self.cancelled is not None and self.cancelled.get(self.job_id):
+            raise ExportCancelled(f"Export job {self.job_id} was cancelled")
+
+
+def _write_excel(pages, path, list_type, tracker):
+    workbook = lazy_import("openpyxl").Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=list_type.title())
+    columns = None
+
+    try:
+        for rows in pages:
+            if columns is None:
+                columns = [column for column in export_columns(list_type, rows[0]) if column != 'id']
+                worksheet.append(columns)
+            for row in rows:
+                worksheet.append([_cell(row.get(column)) for column in columns])
+            tracker.advance(len(rows))
+    except ExportCancelled:
+        worksheet.close()
+        raise
+
+    workbook.save(path)
+
+
+def _write_csv(pages, path, list_type, tracker):
+    with gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=GZIP_LEVEL) as handle:
+        writer = csv.writer(handle)
+        columns = None
+        for rows in pages:
+            if columns is None:
+                columns = export_columns(list_type, rows[0])
+                writer.writerow(columns)
+            writer.writerows([_text(row.get(column)) or "" for column in columns] for row in rows)
+            tracker.advance(len(rows))
+
+
+def _write_jsonl(pages, path, list_type, tracker):
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL) as handle:
+        columns = None
+        for rows in pages:
+            if columns is None:
+                columns = export_columns(list_type, rows[0])
+            handle.writelines(
+                json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False, separators=(",", ":")) + "\n"
+                for row in rows
+            )
+            tracker.advance(len(rows))
+
+
+def _write_parquet(pages, path, list_type, tracker):
+    try:
+        pa = lazy_import("pyarrow")
+        pq = lazy_import("pyarrow.parquet")
+    except ImportError:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+
+    writer = None
+    try:
+        for rows in pages:
+            if writer is None:
+                columns = export_columns(list_type, rows[0])
+                schema = pa.schema([(column, pa.int64() if column == "id" else pa.string()) for column in columns])
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            arrays = [
+                pa.array([row.get(column) for row in rows], type=pa.int64()) if column == "id"
+                else pa.array([_text(row.get(column)) for row in rows], type=pa.string())
+                for column in columns
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            tracker.advance(len(rows))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+FILE_WRITERS = {
+    "excel": _write_excel,
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+}
+
+
+def _write_google_sheets(pages, list_type, tracker):
+    client = get_client()
+
+    sheet_name = f"{list_type.title()} Export {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    spreadsheet = client.create(sheet_name)
+    worksheet = spreadsheet.sheet1
+    columns = None
+    batch = []
+
+    for rows in pages:
+        if columns is None:
+            columns = [column for column in export_columns(list_type, rows[0]) if column != 'id']
+            batch.append(columns)
+        batch.extend([str(_cell(row.get(column))) for column in columns] for row in rows)
+        if len(batch) >= SHEETS_BATCH_ROWS:
+            worksheet.append_rows(batch, value_input_option="RAW")
+            batch = []
+        tracker.advance(len(rows))
+
+    if batch:
+        worksheet.append_rows(batch, value_input_option="RAW")
+
+    spreadsheet.share('', perm_type='anyone', role='reader')
+    return spreadsheet.url
+
+
+def _sync_state_path(list_type):
+    return os.path.join(SHEETS_SYNC_STATE_DIR, f"{list_type}.json")
+
+
+def _load_sync_state(list_type):
+    try:
+        with open(_sync_state_path(list_type)) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _save_sync_state(list_type, state):
+    os.makedirs(SHEETS_SYNC_STATE_DIR, exist_ok=True)
+    path = _sync_state_path(list_type)
+    with open(f"{path}.tmp", "w") as handle:
+        json.dump(state, handle)
+    os.replace(f"{path}.tmp", path)
+
+
+def _row_hash(values):
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def _row_ranges(row_numbers):
+    ranges = []
+    for row_number in sorted(row_numbers, reverse=True):
+        if ranges and ranges[-1][0] == row_number + 1:
+            ranges[-1][0] = row_number
+        else:
+            ranges.append([row_number, row_number])
+    return ranges
+
+
+def sync_google_sheet(job_id, list_type, progress=None, cancelled=None):
+    gspread = lazy_import("gspread")
+    tracker = ExportProgress(job_id, progress, cancelled)
+    columns = None
+    current = {}
+    current_order = []
+
+    for rows in iter_record_pages(get_storage_client(), list_type):
+        if columns is None:
+            columns = export_columns(list_type, rows[0])
+        for row in rows:
+            record_id = str(row["id"])
+            current[record_id] = [str(_cell(row.get(column))) for column in columns]
+            current_order.append(record_id)
+        tracker.advance(len(rows))
+
+    client = get_client()
+    state = _load_sync_state(list_type)
+    if columns is None:
+        columns = state["columns"] if state else list(EXPORT_COLUMNS.get(list_type, ("id",)))
+    spreadsheet = None
+    if state and state["columns"] == columns:
+        try:
+            spreadsheet = client.open_by_key(state["spreadsheet_id"])
+        except gspread.exceptions.SpreadsheetNotFound:
+            spreadsheet = None
+
+    if spreadsheet is None:
+        spreadsheet = client.create(f"OBRC {list_type.title()}")
+        spreadsheet.share('', perm_type='anyone', role='reader')
+        worksheet = spreadsheet.sheet1
+        rows = [columns] + [current[record_id] for record_id in current_order]
+        for start in range(0, len(rows), SHEETS_BATCH_ROWS):
+            worksheet.append_rows(rows[start:start + SHEETS_BATCH_ROWS], value_input_option="RAW")
+        _save_sync_state(list_type, {
+            "spreadsheet_id": spreadsheet.id,
+            "columns": columns,
+            "order": current_order,
+            "hashes": {record_id: _row_hash(current[record_id]) for record_id in current_order},
+        })
+        return {"rows": len(current_order), "path": None, "filename": None, "url": spreadsheet.url,
+                "inserted": len(current_order), "updated": 0, "deleted": 0, "created": True}
+
+    worksheet = spreadsheet.sheet1
+    previous_order = state["order"]
+    previous_hashes = state["hashes"]
+    row_numbers = {record_id: index + 2 for index, record_id in enumerate(previous_order)}
+
+    updated = [
+        record_id for record_id in previous_order
+        if record_id in current and _row_hash(current[record_id]) != previous_hashes.get(record_id)
+    ]
+    deleted = [record_id for record_id in previous_order if record_id not in current]
+    inserted = [record_id for record_id in current_order if record_id not in row_numbers]
+
+    last_column = gspread.utils.rowcol_to_a1(1, len(columns)).rstrip("0123456789")
+    for start in range(0, len(updated), SHEETS_BATCH_ROWS):
+        worksheet.batch_update([
+            {"range": f"A{row_numbers[record_id]}:{last_column}{row_numbers[record_id]}", "values": [current[record_id]]}
+            for record_id in updated[start:start + SHEETS_BATCH_ROWS]
+        ], value_input_option="RAW")
+
+    if deleted:
+        spreadsheet.batch_update({"requests": [
+            {"deleteDimension": {"range": {
+                "sheetId": worksheet.id,
+                "dimension": "ROWS",
+                "startIndex": first - 1,
+                "endIndex": last,
+            }}}
+            for first, last in _row_ranges(row_numbers[record_id] for record_id in deleted)
+        ]})
+
+    for start in range(0, len(inserted), SHEETS_BATCH_ROWS):
+        worksheet.append_rows([current[record_id] for record_id in inserted[start:start + SHEETS_BATCH_ROWS]], value_input_option="RAW")
+
+    order = [record_id for record_id in previous_order if record_id in current] + inserted
+    _save_sync_state(list_type, {
+        "spreadsheet_id": spreadsheet.id,
+        "columns": columns,
+        "order": order,
+        "hashes": {record_id: _row_hash(current[record_id]) for record_id in order},
+    })
+    return {"rows": len(order), "path": None, "filename": None, "url": spreadsheet.url,
+            "inserted": len(inserted), "updated": len(updated), "deleted": len(deleted), "created": False}
+
+
+def _with_sheets_stats(job, *args):
+    before = sheets_client.stats()
+    result = job(*args)
+    after = sheets_client.stats()
+    result["sheets"] = {name: after[name] - before[name] for name in after}
+    return result
+
+
+def run_export_job(job_id, list_type, format_type, output_dir, progress=None, cancelled=None):
+    if format_type == "google_sheets_sync":
+        return _with_sheets_stats(sync_google_sheet, job_id, list_type, progress, cancelled)
+    if format_type == "google_sheets":
+        return _with_sheets_stats(_run_file_or_sheet_export, job_id, list_type, format_type, output_dir, progress, cancelled)
+    return _run_file_or_sheet_export(job_id, list_type, format_type, output_dir, progress, cancelled)
+
+
+def _run_file_or_sheet_export(job_id, list_type, format_type, output_dir, progress=None, cancelled=None):
+    tracker = ExportProgress(job_id, progress, cancelled)
+    pages = iter_record_pages(get_storage_client(), list_type)
+    first_page = next(pages, None)
+    if first_page is None:
+        return {"rows": 0, "path": None, "filename": None, "url": None}
+    pages = itertools.chain([first_page], pages)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if format_type in FILE_WRITERS:
+        filename = f"{list_type}_export_{timestamp}.{FILE_EXTENSIONS[format_type]}"
+        path = os.path.join(output_dir, f"{job_id}_{filename}")
+        try:
+            FILE_WRITERS[format_type](pages, path, list_type, tracker)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return {"rows": tracker.rows, "path": path, "filename": filename, "url": None, "bytes": os.path.getsize(path)}
+
+    if format_type == "google_sheets":
+        url = _write_google_sheets(pages, list_type, tracker)
+        return {"rows": tracker.rows, "path": None, "filename": None, "url": url}
+
+    raise ValueError(f"Unknown export format: {format_type}")